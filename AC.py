@@ -1,19 +1,223 @@
 from cryptography import x509
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.x509.oid import NameOID
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
 from datetime import timedelta
+from functools import lru_cache
+from itertools import islice
+from dataclasses import dataclass
 import datetime
+import os
 import random
 
+from cache import LRUCache
+from cert_store import CertificateStore, certificate_record
+from revocation import RevocationIndex
+
+SUBJECT_FIELDS = ("common_name", "country", "state", "locality", "organization")
+# Quantidade de certificados enviada a cada tarefa do pool de emissao
+ISSUE_BATCH_SIZE = 256
+# Quantidade maxima de resultados de validacao mantidos em cache por AC
+VALIDATION_CACHE_SIZE = 65536
+# Numero minimo de verificacoes pendentes para usar o pool de processos na validacao em lote
+PARALLEL_VALIDATION_THRESHOLD = 256
+
+VALID_REASON = "Certificado válido."
+EXPIRED_REASON = "Certificado fora do período de validade."
+REVOKED_REASON = "Certificado revogado."
+INCOMPLETE_CHAIN_REASON = "Cadeia de certificação incompleta."
+NOT_CA_REASON = "Certificado intermediário não é de uma AC."
+PATH_LENGTH_REASON = "Comprimento máximo do caminho de certificação excedido."
+
+# Quantidade maxima de ACs intermediarias percorridas na construcao de um caminho
+MAX_CHAIN_DEPTH = 8
+# Quantidade maxima de ligacoes (emissor, AC intermediaria) verificadas mantidas em cache
+CHAIN_LINK_CACHE_SIZE = 4096
+
+# Intervalo ate a proxima publicacao da LCR completa e das LCRs delta
+CRL_VALIDITY = timedelta(days=7)
+DELTA_CRL_VALIDITY = timedelta(days=1)
+
+
+@dataclass(frozen=True)
+class ValidationResult:
+    """
+    Resultado da validacao de um certificado.
+
+    Attributes:
+        valid (bool): Se o certificado e valido.
+        reason (str): Descricao do resultado.
+        public_key: A chave publica do certificado, ou None se o certificado nao for valido.
+    """
+    valid: bool
+    reason: str
+    public_key: object = None
+
+
+class _ValidationCache:
+    """
+    Cache LRU de resultados de validacao cujas entradas expiram junto com o certificado.
+    """
+    def __init__(self, maxsize):
+        self.__entries = LRUCache(maxsize)
+
+    def get(self, fingerprint):
+        entry = self.__entries.get(fingerprint)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < datetime.datetime.now(datetime.timezone.utc):
+            self.__entries.pop(fingerprint)
+            return None
+        return result
+
+    def put(self, fingerprint, result, expires_at):
+        self.__entries.put(fingerprint, (expires_at, result))
+
+    def clear(self):
+        self.__entries.clear()
+
+
+@lru_cache(maxsize=4096)
+def _name_attribute(oid, value):
+    """
+    Retorna o atributo de nome, reaproveitando a mesma instancia para valores repetidos.
+    """
+    return x509.NameAttribute(oid, value)
+
+
+@lru_cache(maxsize=4096)
+def _build_name(common_name, country, state, locality, organization):
+    """
+    Monta (e internaliza) o x509.Name com os cinco atributos usados pela AC.
+    """
+    return x509.Name([
+        _name_attribute(NameOID.COUNTRY_NAME, country),
+        _name_attribute(NameOID.STATE_OR_PROVINCE_NAME, state),
+        _name_attribute(NameOID.LOCALITY_NAME, locality),
+        _name_attribute(NameOID.ORGANIZATION_NAME, organization),
+        _name_attribute(NameOID.COMMON_NAME, common_name)
+    ])
+
+
+def _subject_fields(subject):
+    """
+    Normaliza os campos do requerente (dicionario ou sequencia) na ordem de SUBJECT_FIELDS.
+    """
+    if isinstance(subject, Mapping):
+        return tuple(subject[field] for field in SUBJECT_FIELDS)
+    return tuple(subject)
+
+
+def _sign_end_certificate(issuer_name, issuer_key, public_key, fields, not_before, not_after):
+    return x509.CertificateBuilder(issuer_name,
+                                   _build_name(*fields),
+                                   public_key,
+                                   x509.random_serial_number(),
+                                   not_before,
+                                   not_after).sign(issuer_key, hashes.SHA256())
+
+
+# Estado de cada processo do pool de emissao, carregado uma unica vez por _init_issuer_worker
+_worker_issuer_key = None
+_worker_issuer_name = None
+
+
+def _init_issuer_worker(ca_key_der, ca_certificate_der):
+    global _worker_issuer_key, _worker_issuer_name
+    _worker_issuer_key = serialization.load_der_private_key(ca_key_der, password=None)
+    _worker_issuer_name = x509.load_der_x509_certificate(ca_certificate_der).subject
+
+
+def _issue_batch_in_worker(batch, not_before, not_after, encoding):
+    """
+    Assina um lote de (chave publica DER, campos) no processo do pool.
+
+    Returns:
+        list: Pares (certificado codificado, registro de `certificate_record`), para que o
+            processo principal grave os certificados sem interpreta-los novamente.
+    """
+    issued = []
+    for public_key_der, fields in batch:
+        cert = _sign_end_certificate(_worker_issuer_name,
+                                     _worker_issuer_key,
+                                     serialization.load_der_public_key(public_key_der),
+                                     fields,
+                                     not_before,
+                                     not_after)
+        record = certificate_record(cert)
+        issued.append((record[3] if encoding == serialization.Encoding.DER else cert.public_bytes(encoding), record))
+    return issued
+
+
+def _verify_issued_by(ca_certificate, cert):
+    """
+    Verifica a assinatura PKCS#1 v1.5 do certificado com a chave da AC.
+
+    Returns:
+        str or None: A descricao do erro, ou None se a assinatura for valida.
+    """
+    try:
+        ca_certificate.public_key().verify(
+            cert.signature,
+            cert.tbs_certificate_bytes,
+            padding.PKCS1v15(),
+            cert.signature_hash_algorithm
+        )
+    except Exception as e:
+        return str(e) or type(e).__name__
+    return None
+
+
+def _verify_directly_issued_by(issuer, cert):
+    """
+    Verifica se o certificado foi emitido diretamente por `issuer` (nome e assinatura).
+
+    Returns:
+        str or None: A descricao do erro, ou None se a assinatura for valida.
+    """
+    try:
+        cert.verify_directly_issued_by(issuer)
+    except Exception as e:
+        return str(e) or type(e).__name__
+    return None
+
+
+# Certificado da AC em cada processo do pool de validacao
+_worker_ca_certificate = None
+
+
+def _init_validator_worker(ca_certificate_der):
+    global _worker_ca_certificate
+    _worker_ca_certificate = x509.load_der_x509_certificate(ca_certificate_der)
+
+
+def _verify_in_worker(cert_der):
+    return _verify_issued_by(_worker_ca_certificate, x509.load_der_x509_certificate(cert_der))
+
 
 class AC:
-    def __init__(self):
-        self.certificados = {}
+    def __init__(self, certificados=None):
+        """
+        Args:
+            certificados (CertificateStore): Armazenamento dos certificados emitidos.
+                Padrao: um armazenamento em memoria.
+        """
+        self.certificados = certificados if certificados is not None else CertificateStore()
         self.ca_certificate = None
         self.ca_private_key = None
         self.ca_name = None
+        self.__validation_cache = _ValidationCache(VALIDATION_CACHE_SIZE)
+        self.revogados = RevocationIndex(serial for serial, _ in self.certificados.revocations())
+        self.crl = None
+        self.delta_crl = None
+        self.__chain_link_cache = _ValidationCache(CHAIN_LINK_CACHE_SIZE)
+        self.__revocation_listeners = []
 
     def __get_not_before_and_not_after(self):
         """
@@ -40,25 +244,79 @@ class AC:
         ca_private_key = rsa.generate_private_key(65537, 2048)
         not_before, not_after = self.__get_not_before_and_not_after()
 
-        self.ca_name = subject = issuer = x509.Name([
-            x509.NameAttribute(NameOID.COUNTRY_NAME, country),
-            x509.NameAttribute(NameOID.STATE_OR_PROVINCE_NAME, state),
-            x509.NameAttribute(NameOID.LOCALITY_NAME, locality),
-            x509.NameAttribute(NameOID.ORGANIZATION_NAME, organization),
-            x509.NameAttribute(NameOID.COMMON_NAME, common_name)
-        ])
+        self.ca_name = subject = issuer = _build_name(common_name, country, state, locality, organization)
 
         ca_certificate = x509.CertificateBuilder(issuer,
                                                       subject,
                                                       ca_private_key.public_key(),
                                                       x509.random_serial_number(),
                                                       not_before,
-                                                      not_after).sign(ca_private_key, hashes.SHA256())
+                                                      not_after) \
+            .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True) \
+            .sign(ca_private_key, hashes.SHA256())
 
+        self.__set_ca(ca_certificate, ca_private_key)
+        return ca_certificate, ca_private_key
+
+    def __set_ca(self, ca_certificate, ca_private_key):
         self.ca_certificate = ca_certificate
         self.ca_private_key = ca_private_key
-        return ca_certificate, ca_private_key
-        
+        self.ca_name = ca_certificate.subject
+        self.__validation_cache.clear()
+        self.__chain_link_cache.clear()
+        self.certificados.add(ca_certificate)
+
+    def issueIntermediateCertificate(self, public_key, common_name, country, state, locality, organization, path_length=0):
+        """
+        Emite o certificado de uma AC intermediaria (basicConstraints CA=True) com validade de 1 ano.
+
+        Args:
+            public_key: A chave publica da AC intermediaria.
+            common_name (str): O nome comum (CN) da AC intermediaria.
+            country (str): O pais do certificado.
+            state (str): O estado do certificado.
+            locality (str): A cidade ou endereco do certificado.
+            organization (str): O nome da organizacao da AC intermediaria.
+            path_length (int): Quantidade maxima de ACs intermediarias abaixo desta (None: sem limite).
+
+        Returns:
+            cert (Certificate): O certificado X.509 da AC intermediaria.
+        """
+        not_before, not_after = self.__get_not_before_and_not_after()
+        cert = x509.CertificateBuilder(self.ca_name,
+                                       _build_name(common_name, country, state, locality, organization),
+                                       public_key,
+                                       x509.random_serial_number(),
+                                       not_before,
+                                       not_after) \
+            .add_extension(x509.BasicConstraints(ca=True, path_length=path_length), critical=True) \
+            .add_extension(x509.KeyUsage(digital_signature=False, content_commitment=False,
+                                         key_encipherment=False, data_encipherment=False,
+                                         key_agreement=False, key_cert_sign=True, crl_sign=True,
+                                         encipher_only=False, decipher_only=False), critical=True) \
+            .sign(self.ca_private_key, hashes.SHA256())
+        self.certificados.add(cert)
+        return cert
+
+    def issueIntermediateAC(self, common_name, country="BR", state="SC", locality="Fln", organization="UFSC",
+                            path_length=0, certificados=None):
+        """
+        Cria uma AC intermediaria subordinada a esta, com par de chaves proprio.
+
+        Args:
+            common_name (str): O nome comum (CN) da AC intermediaria.
+            path_length (int): Quantidade maxima de ACs intermediarias abaixo da nova AC.
+            certificados (CertificateStore): Armazenamento da nova AC. Padrao: em memoria.
+
+        Returns:
+            AC: A AC intermediaria, pronta para emitir certificados.
+        """
+        private_key = rsa.generate_private_key(65537, 2048)
+        cert = self.issueIntermediateCertificate(private_key.public_key(), common_name, country,
+                                                 state, locality, organization, path_length)
+        intermediate = AC(certificados)
+        intermediate.__set_ca(cert, private_key)
+        return intermediate
 
     def issueEndCertificate(self, public_key, common_name, country, state, locality, organization):
         """
@@ -75,25 +333,309 @@ class AC:
         Returns:
             cert (Certificate): O certificado X.509.
         """
-        subject = x509.Name([
-            x509.NameAttribute(NameOID.COUNTRY_NAME, country),
-            x509.NameAttribute(NameOID.STATE_OR_PROVINCE_NAME, state),
-            x509.NameAttribute(NameOID.LOCALITY_NAME, locality),
-            x509.NameAttribute(NameOID.ORGANIZATION_NAME, organization),
-            x509.NameAttribute(NameOID.COMMON_NAME, common_name)
-        ])
         not_before, not_after = self.__get_not_before_and_not_after()
-        return x509.CertificateBuilder(self.ca_name,
-                                       subject,
-                                       public_key,
-                                       x509.random_serial_number(),
-                                       not_before,
-                                       not_after).sign(self.ca_private_key, hashes.SHA256())
+        cert = _sign_end_certificate(self.ca_name,
+                                     self.ca_private_key,
+                                     public_key,
+                                     (common_name, country, state, locality, organization),
+                                     not_before,
+                                     not_after)
+        self.certificados.add(cert)
+        return cert
+
+    def issueEndCertificates(self, requests, workers=None, encoding=serialization.Encoding.DER):
+        """
+        Emite certificados finais em lote, com a mesma validade de 1 ano para todo o lote.
+
+        Os pedidos sao agrupados em lotes de ISSUE_BATCH_SIZE e assinados em um pool de processos;
+        a chave da CA e serializada uma unica vez por processo. Os certificados sao devolvidos
+        sob demanda, na ordem dos pedidos, mantendo poucos lotes em andamento por vez, e cada
+        lote e gravado em self.certificados em uma unica transacao.
+
+        Args:
+            requests (iterable): Pares (chave publica, campos do requerente), onde os campos sao um
+                dicionario com as chaves de SUBJECT_FIELDS ou uma sequencia nessa ordem.
+            workers (int): Quantidade de processos (1 assina no processo atual). Padrao: numero de CPUs.
+            encoding (Encoding): Formato de saida (DER ou PEM).
+
+        Returns:
+            iterator: Os certificados codificados (bytes).
+        """
+        not_before, not_after = self.__get_not_before_and_not_after()
+        workers = workers or os.cpu_count() or 1
+        pending = ((public_key, _subject_fields(subject)) for public_key, subject in requests)
+
+        if workers == 1:
+            while batch := list(islice(pending, ISSUE_BATCH_SIZE)):
+                certs = [
+                    _sign_end_certificate(self.ca_name, self.ca_private_key, public_key,
+                                          fields, not_before, not_after)
+                    for public_key, fields in batch
+                ]
+                self.certificados.add_many(certs)
+                yield from (cert.public_bytes(encoding) for cert in certs)
+            return
+
+        ca_key_der = self.ca_private_key.private_bytes(serialization.Encoding.DER,
+                                                       serialization.PrivateFormat.PKCS8,
+                                                       serialization.NoEncryption())
+        ca_certificate_der = self.ca_certificate.public_bytes(serialization.Encoding.DER)
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_issuer_worker,
+                                 initargs=(ca_key_der, ca_certificate_der)) as executor:
+            in_flight = deque()
+            while True:
+                batch = [
+                    (public_key.public_bytes(serialization.Encoding.DER,
+                                             serialization.PublicFormat.SubjectPublicKeyInfo), fields)
+                    for public_key, fields in islice(pending, ISSUE_BATCH_SIZE)
+                ]
+                if batch:
+                    in_flight.append(executor.submit(_issue_batch_in_worker, batch,
+                                                     not_before, not_after, encoding))
+                if in_flight and (not batch or len(in_flight) >= 2 * workers):
+                    issued = in_flight.popleft().result()
+                    self.certificados.add_records(record for _, record in issued)
+                    yield from (encoded for encoded, _ in issued)
+                elif not batch:
+                    return
+
+    def checkCertificate(self, cert):
+        """
+        Valida um certificado (validade, revogacao e assinatura desta AC), retornando um resultado estruturado.
+
+        O resultado da verificacao de assinatura fica em cache, indexado pela impressao digital
+        SHA-256 do certificado, ate o fim da validade do certificado.
+
+        Args:
+            cert (Certificate): O certificado a ser validado.
+
+        Returns:
+            ValidationResult: O resultado da validacao.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        if cert.not_valid_after_utc < now:
+            return ValidationResult(False, EXPIRED_REASON)
+        if cert.serial_number in self.revogados:
+            return ValidationResult(False, REVOKED_REASON)
+
+        fingerprint = cert.fingerprint(hashes.SHA256())
+        cached = self.__validation_cache.get(fingerprint)
+        if cached is not None:
+            return cached
+        return self.__cache_validation(cert, fingerprint, _verify_issued_by(self.ca_certificate, cert))
+
+    def validateCertificates(self, certs, workers=None):
+        """
+        Valida um lote de certificados, verificando cada certificado distinto uma unica vez.
+
+        Certificados repetidos (mesma impressao digital) compartilham o resultado, e as
+        verificacoes ausentes do cache sao distribuidas em um pool de processos quando sao
+        ao menos PARALLEL_VALIDATION_THRESHOLD.
+
+        Args:
+            certs (iterable): Os certificados a serem validados.
+            workers (int): Quantidade de processos (1 valida no processo atual). Padrao: numero de CPUs.
+
+        Returns:
+            list[ValidationResult]: Os resultados, na ordem dos certificados recebidos.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        certs = list(certs)
+        results = {}
+        misses = {}
+        for cert in certs:
+            fingerprint = cert.fingerprint(hashes.SHA256())
+            if fingerprint in results or fingerprint in misses:
+                continue
+            if cert.not_valid_after_utc < now:
+                results[fingerprint] = ValidationResult(False, EXPIRED_REASON)
+                continue
+            if cert.serial_number in self.revogados:
+                results[fingerprint] = ValidationResult(False, REVOKED_REASON)
+                continue
+            cached = self.__validation_cache.get(fingerprint)
+            if cached is not None:
+                results[fingerprint] = cached
+            else:
+                misses[fingerprint] = cert
+
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(misses) >= PARALLEL_VALIDATION_THRESHOLD:
+            ca_certificate_der = self.ca_certificate.public_bytes(serialization.Encoding.DER)
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=_init_validator_worker,
+                                     initargs=(ca_certificate_der,)) as executor:
+                errors = executor.map(_verify_in_worker,
+                                      [cert.public_bytes(serialization.Encoding.DER) for cert in misses.values()],
+                                      chunksize=max(1, len(misses) // (4 * workers)))
+                errors = list(errors)
+        else:
+            errors = [_verify_issued_by(self.ca_certificate, cert) for cert in misses.values()]
+
+        for (fingerprint, cert), error in zip(misses.items(), errors):
+            results[fingerprint] = self.__cache_validation(cert, fingerprint, error)
+        return [results[cert.fingerprint(hashes.SHA256())] for cert in certs]
+
+    def __cache_validation(self, cert, fingerprint, error):
+        """
+        Monta o resultado da verificacao de assinatura e o guarda no cache.
+        """
+        if error is None:
+            result = ValidationResult(True, VALID_REASON, cert.public_key())
+        else:
+            result = ValidationResult(False, f"Erro na validação do certificado: {error}")
+        self.__validation_cache.put(fingerprint, result, cert.not_valid_after_utc)
+        return result
+
+    def revokeCertificate(self, serial_number, revocation_date=None):
+        """
+        Revoga um certificado pelo numero de serie. A revogacao vale imediatamente para as
+        validacoes desta AC e entra na proxima LCR delta, sem reassinar a LCR completa.
+
+        Args:
+            serial_number (int): O numero de serie do certificado.
+            revocation_date (datetime): O instante da revogacao. Padrao: agora.
+        """
+        if serial_number in self.revogados:
+            return
+        revocation_date = revocation_date or datetime.datetime.now(datetime.timezone.utc)
+        self.certificados.revoke(serial_number, revocation_date)
+        self.revogados.add(serial_number)
+        for listener in self.__revocation_listeners:
+            listener(serial_number)
+
+    def addRevocationListener(self, listener):
+        """
+        Registra uma funcao chamada com o numero de serie a cada nova revogacao.
+        """
+        self.__revocation_listeners.append(listener)
+
+    def __build_crl(self, entries, validity, delta_of=None):
+        """
+        Monta e assina uma LCR com os pares (numero de serie, data) informados.
+        """
+        crl_number = self.certificados.increment("crl_number")
+        last_update = datetime.datetime.now(datetime.timezone.utc)
+        # A lista e entregue pronta ao builder: add_revoked_certificate copia a lista
+        # inteira a cada chamada, o que torna a montagem O(n^2) em LCRs grandes
+        revoked = [
+            x509.RevokedCertificateBuilder()
+            .serial_number(serial_number)
+            .revocation_date(revocation_date)
+            .build()
+            for serial_number, revocation_date in entries
+        ]
+        builder = x509.CertificateRevocationListBuilder(revoked_certificates=revoked) \
+            .issuer_name(self.ca_name) \
+            .last_update(last_update) \
+            .next_update(last_update + validity) \
+            .add_extension(x509.CRLNumber(crl_number), critical=False)
+        if delta_of is not None:
+            builder = builder.add_extension(x509.DeltaCRLIndicator(delta_of), critical=True)
+        return builder.sign(self.ca_private_key, hashes.SHA256())
+
+    def publishCRL(self):
+        """
+        Publica a LCR completa, com todas as revogacoes registradas, e reinicia as LCRs delta.
+        O numero da LCR e a marca das revogacoes incluidas ficam no armazenamento, de modo que
+        a numeracao e as LCRs delta continuam de onde pararam se a AC for reiniciada.
+
+        Returns:
+            CertificateRevocationList: A LCR assinada pela AC.
+        """
+        # Marca obtida antes da leitura: uma revogacao concorrente pode aparecer tambem na
+        # proxima delta, mas nunca fica de fora das duas
+        included = self.certificados.last_revocation_id()
+        self.crl = self.__build_crl(self.certificados.revocations(), CRL_VALIDITY)
+        self.delta_crl = None
+        self.certificados.set_values(
+            full_crl_number=self.crl.extensions.get_extension_for_class(x509.CRLNumber).value.crl_number,
+            full_crl_revocation_id=included,
+        )
+        return self.crl
+
+    def publishDeltaCRL(self):
+        """
+        Publica uma LCR delta com as revogacoes feitas desde a ultima LCR completa.
+
+        Returns:
+            CertificateRevocationList: A LCR delta assinada pela AC.
+        """
+        base_number = self.certificados.get_value("full_crl_number")
+        if base_number is None:
+            return self.publishCRL()
+        revocations = self.certificados.revocations(after=self.certificados.get_value("full_crl_revocation_id", 0))
+        self.delta_crl = self.__build_crl(revocations, DELTA_CRL_VALIDITY, delta_of=base_number)
+        return self.delta_crl
+
+    def validateChain(self, cert, intermediates=()):
+        """
+        Valida um certificado emitido abaixo desta AC (raiz de confianca), construindo o caminho
+        ate ela a partir das ACs intermediarias informadas.
+
+        As ligacoes ja verificadas entre um emissor e uma AC intermediaria ficam em cache
+        (indexadas pelas impressoes digitais de ambos os certificados) ate o fim da validade da
+        intermediaria; com o cache aquecido, validar um certificado final custa uma unica
+        verificacao de assinatura. A revogacao e verificada apenas para os certificados
+        emitidos diretamente por esta AC.
+
+        Args:
+            cert (Certificate): O certificado final a ser validado.
+            intermediates (iterable): Certificados das ACs intermediarias disponiveis.
+
+        Returns:
+            ValidationResult: O resultado da validacao, com a chave publica do certificado final.
+        """
+        if cert.issuer == self.ca_name:
+            return self.checkCertificate(cert)
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        by_subject = {intermediate.subject: intermediate for intermediate in intermediates}
+        current, depth = cert, 0
+        while current.issuer != self.ca_name:
+            issuer = by_subject.get(current.issuer)
+            if issuer is None or depth >= MAX_CHAIN_DEPTH:
+                return ValidationResult(False, INCOMPLETE_CHAIN_REASON)
+            if current.not_valid_after_utc < now or issuer.not_valid_after_utc < now:
+                return ValidationResult(False, EXPIRED_REASON)
+            try:
+                constraints = issuer.extensions.get_extension_for_class(x509.BasicConstraints).value
+            except x509.ExtensionNotFound:
+                return ValidationResult(False, NOT_CA_REASON)
+            if not constraints.ca:
+                return ValidationResult(False, NOT_CA_REASON)
+            if constraints.path_length is not None and constraints.path_length < depth:
+                return ValidationResult(False, PATH_LENGTH_REASON)
+
+            error = self.__verify_link(issuer, current) if depth else _verify_directly_issued_by(issuer, current)
+            if error is not None:
+                return ValidationResult(False, f"Erro na validação do certificado: {error}")
+            current, depth = issuer, depth + 1
+
+        # current e uma AC intermediaria emitida por esta AC
+        result = self.checkCertificate(current)
+        if not result.valid:
+            return result
+        return ValidationResult(True, VALID_REASON, cert.public_key())
+
+    def __verify_link(self, issuer, child):
+        """
+        Verifica (com cache) se a AC intermediaria `child` foi emitida por `issuer`.
+        """
+        key = (issuer.fingerprint(hashes.SHA256()), child.fingerprint(hashes.SHA256()))
+        cached = self.__chain_link_cache.get(key)
+        if cached is not None:
+            return cached or None
+        error = _verify_directly_issued_by(issuer, child)
+        self.__chain_link_cache.put(key, error or "", child.not_valid_after_utc)
+        return error
 
     def validateCertificate(self, cert):
         """
         Recupera a chave pública de um certificado se este não estiver expirado e tenha sido assinado por esta AC.
         Obs: a validacao feita neste metodo apenas se refere a data de validade do certificado e se este foi assinado pela AC, sendo assim, uma simplificação.
+        O motivo de uma falha pode ser obtido com checkCertificate.
 
         Args:
             cert (Certificate): O certificado a ser validado.
@@ -101,21 +643,4 @@ class AC:
         Returns:
             CryptoRSA.RsaKey or None: A chave publica do certificado, ou None se o certificado não for valido.
         """
-        certificate: x509.Certificate = cert
-        if cert.not_valid_after_utc < datetime.datetime.now(datetime.timezone.utc):
-            print("Certificado fora do período de validade.")
-            return None
-
-        try:
-            self.ca_certificate.public_key().verify(
-                cert.signature,
-                cert.tbs_certificate_bytes,
-                padding.PKCS1v15(),
-                cert.signature_hash_algorithm
-            )
-            print("Certificado válido.")
-        except Exception as e:
-            print(f"Erro na validação do certificado: {e}")
-            return None
-
-        return cert.public_key()
+        return self.checkCertificate(cert).public_key
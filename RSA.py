@@ -2,25 +2,140 @@
 Implementação do modelo RSA fornecido no enunciado
 """
 import base64
+import hashlib
+import io
+import struct
+from typing import BinaryIO, Iterable, NamedTuple, Union
 
 from Cryptodome.PublicKey import RSA as rsa
-from Cryptodome.Cipher import PKCS1_OAEP
+from Cryptodome.Cipher import AES, PKCS1_OAEP
+from Cryptodome.Hash import SHA256
+from Cryptodome.Protocol.KDF import HKDF
+from Cryptodome.Random import get_random_bytes
+
+import aes
+from cache import LRUCache
+
+# Formato do envelope (RSA-OAEP + AES-GCM):
+#   ENVELOPE_MAGIC | n (2 bytes) | n x [id da chave (8) | tamanho (2) | chave de sessão cifrada]
+#   | sal (16) | tamanho do segmento (4) | segmentos cifrados (texto + etiqueta de 16 bytes)
+# Cada envelope é cifrado com uma chave própria, HKDF-SHA256(chave de sessão, sal), de modo que
+# envelopes de um mesmo lote (mesma chave de sessão) nunca repetem um par (chave, nonce) do GCM.
+# O nonce de cada segmento é zeros (7) | índice (4) | indicador de último segmento (1), e o
+# SHA-256 do cabeçalho entra como dado associado de todos os segmentos.
+ENVELOPE_MAGIC = b'ENV1'
+SESSION_KEY_SIZE = 32
+KEY_ID_SIZE = 8
+SALT_SIZE = 16
+SEGMENT_SIZE = 64 * 1024
+# Maior segmento aceito: o tamanho vem do cabeçalho (ainda não autenticado) e define a memória alocada
+MAX_SEGMENT_SIZE = 16 * SEGMENT_SIZE
+# Quantidade de chaves de sessão decifradas mantidas em cache por instância
+SESSION_KEY_CACHE_SIZE = 1024
+# Quantidade de destinatários (chave importada + cifra OAEP) mantidos no registro global
+RECIPIENT_CACHE_SIZE = 1024
+
+# Chave pública já importada ou sua exportação em PEM (bytes ou str) ou DER
+PublicKeySource = Union[rsa.RsaKey, bytes, str]
+
+
+def key_id(public_key: rsa.RsaKey) -> bytes:
+    """
+    Identifica uma chave pública pelos primeiros bytes do SHA-256 de sua codificação DER.
+    """
+    return hashlib.sha256(public_key.export_key(format='DER')).digest()[:KEY_ID_SIZE]
+
+
+class Recipient(NamedTuple):
+    """Chave pública de um destinatário com sua cifra OAEP pronta para uso"""
+    public_key: rsa.RsaKey
+    key_id: bytes
+    cipher: object
+
+
+class RecipientRegistry:
+    """
+    Registro de destinatários: importa cada chave pública e cria sua cifra OAEP uma única vez.
+
+    As entradas ficam em um LRU limitado, indexadas pela impressão digital da chave: o SHA-256
+    dos bytes recebidos (PEM/DER), o que evita reimportar a chave a cada mensagem, ou o par
+    (n, e) quando a chave já vem importada.
+    """
+
+    def __init__(self, maxsize: int = RECIPIENT_CACHE_SIZE) -> None:
+        self.cache = LRUCache(maxsize)
+
+    @staticmethod
+    def fingerprint(public_key: PublicKeySource):
+        """
+        Calcula a chave de cache de uma chave pública, sem importá-la.
+        """
+        if isinstance(public_key, rsa.RsaKey):
+            return public_key.n, public_key.e
+        if isinstance(public_key, str):
+            public_key = public_key.encode()
+        return hashlib.sha256(public_key).digest()
+
+    def get(self, public_key: PublicKeySource) -> Recipient:
+        """
+        Retorna o destinatário da chave, importando-a e criando sua cifra apenas na primeira vez.
+
+        :param public_key: Chave pública importada ou em PEM/DER.
+        :return: O destinatário com a chave importada, seu identificador e sua cifra OAEP.
+        """
+        return self.cache.get_or_create(self.fingerprint(public_key), lambda: self.__create(public_key))
+
+    @staticmethod
+    def __create(public_key: PublicKeySource) -> Recipient:
+        if not isinstance(public_key, rsa.RsaKey):
+            public_key = rsa.import_key(public_key)
+        if public_key.has_private():
+            public_key = public_key.public_key()
+        return Recipient(public_key, key_id(public_key), PKCS1_OAEP.new(public_key))
+
+
+RECIPIENTS = RecipientRegistry()
+
+
+def get_recipient(public_key: PublicKeySource) -> Recipient:
+    """Retorna o destinatário em cache no registro global"""
+    return RECIPIENTS.get(public_key)
+
+
+def _envelope_key(session_key: bytes, salt: bytes) -> bytes:
+    return HKDF(session_key, SESSION_KEY_SIZE, salt, SHA256, context=ENVELOPE_MAGIC)
+
+
+def _segment_nonce(index: int, last: bool) -> bytes:
+    return struct.pack('>7xI?', index, last)
+
+
+def _read_exact(reader, size: int) -> bytes:
+    buffer = bytearray(size)
+    if aes.read_full(reader, buffer) < size:
+        raise ValueError('Envelope truncado')
+    return bytes(buffer)
 
 
 class RSA:
     """Classe que encapsula operações do algoritmo RSA"""
 
-    def __init__(self, key_size: int = 2048, public_exponent: int = 65537) -> None:
+    def __init__(self, key_size: int = 2048, public_exponent: int = 65537, key: rsa.RsaKey = None) -> None:
         """
         Inicializa a classe RSA, gerando um par de chaves (pública e privada) com o tamanho e o expoente fornecidos.
 
         :param key_size: Tamanho da chave RSA em bits (padrão 2048).
         :param public_exponent: Expoente público para geração da chave (padrão 65537).
+        :param key: Chave privada RSA já existente (ex.: de um KeyPool); se informada, nenhuma chave é gerada.
         :return: Nenhum valor de retorno (None).
         """
         self.private_key, self.public_key = None, None
-        self.generate_keys(key_size, public_exponent)
+        if key is None:
+            self.generate_keys(key_size, public_exponent)
+        else:
+            self.private_key, self.public_key = key, key.public_key()
         self.cipher = PKCS1_OAEP.new(self.private_key)
+        self.__session_keys = LRUCache(SESSION_KEY_CACHE_SIZE)
 
     def generate_keys(self, key_size: int, public_exponent: int) -> None:
         """
@@ -33,18 +148,46 @@ class RSA:
         self.private_key = key
         self.public_key = key.public_key()
 
-    def encrypt_message(self, message: str, public_key: rsa.RsaKey) -> str:
+    def encrypt_message(self, message: str, public_key: PublicKeySource) -> str:
         """
         Criptografa uma mensagem utilizando a chave pública fornecida.
 
         :param message: A mensagem em texto plano que será criptografada.
-        :param public_key: A chave pública do destinatário que será usada para a criptografia.
+        :param public_key: A chave pública do destinatário (importada ou em PEM/DER) que será usada para a criptografia.
         :return: A mensagem criptografada, codificada em base64.
         """
-        cipher = PKCS1_OAEP.new(public_key)
+        cipher = get_recipient(public_key).cipher
         ciphered = cipher.encrypt(message.encode())
         return base64.b64encode(ciphered).decode()
 
+    def encrypt_messages(self, messages: Iterable[tuple[str, PublicKeySource]]) -> list[str]:
+        """
+        Criptografa um lote de mensagens, cada uma para seu destinatário; cada chave é importada
+        (e sua cifra criada) uma única vez, mesmo que apareça em várias mensagens.
+
+        :param messages: Pares (mensagem, chave pública do destinatário).
+        :return: As mensagens criptografadas em base64, na ordem de entrada.
+        """
+        ciphers = {}
+        ciphered = []
+        for message, public_key in messages:
+            fingerprint = RECIPIENTS.fingerprint(public_key)
+            cipher = ciphers.get(fingerprint)
+            if cipher is None:
+                cipher = ciphers[fingerprint] = get_recipient(public_key).cipher
+            ciphered.append(base64.b64encode(cipher.encrypt(message.encode())).decode())
+        return ciphered
+
+    def encrypt_for_recipients(self, message: str, recipients: Iterable[PublicKeySource]) -> list[str]:
+        """
+        Criptografa a mesma mensagem para vários destinatários.
+
+        :param message: A mensagem em texto plano.
+        :param recipients: As chaves públicas dos destinatários (importadas ou em PEM/DER).
+        :return: Uma mensagem criptografada em base64 por destinatário, na ordem de entrada.
+        """
+        return self.encrypt_messages((message, public_key) for public_key in recipients)
+
     def decrypt_message(self, ciphertext: str) -> str:
         """
         Descriptografa uma mensagem criptografada usando a chave privada do destinatário (essa classe!).
@@ -62,4 +205,181 @@ class RSA:
 
         :return: A chave pública em formato exportável (bytes).
         """
-        return self.public_key.export_key()  # exports in PEM format by default 
+        return self.public_key.export_key()  # exports in PEM format by default
+
+    def __new_session(self, recipients: Iterable[PublicKeySource]) -> tuple[bytes, list[tuple[bytes, bytes]]]:
+        """
+        Sorteia uma chave de sessão AES e a cifra com RSA-OAEP para cada destinatário.
+
+        :return: A chave de sessão e os pares (id da chave, chave de sessão cifrada).
+        """
+        session_key = get_random_bytes(SESSION_KEY_SIZE)
+        wrapped = []
+        for public_key in recipients:
+            recipient = get_recipient(public_key)
+            wrapped.append((recipient.key_id, recipient.cipher.encrypt(session_key)))
+        if not wrapped:
+            raise ValueError('O envelope precisa de ao menos um destinatário')
+        return session_key, wrapped
+
+    def __encrypt_envelope_stream(self, source: aes.StreamSource, destination: BinaryIO,
+                                  session: tuple[bytes, list[tuple[bytes, bytes]]], segment_size: int) -> int:
+        if not 0 < segment_size <= MAX_SEGMENT_SIZE:
+            raise ValueError(f'segment_size deve estar entre 1 e {MAX_SEGMENT_SIZE}')
+        session_key, wrapped = session
+        salt = get_random_bytes(SALT_SIZE)
+        header = b''.join(
+            [ENVELOPE_MAGIC, struct.pack('>H', len(wrapped))]
+            + [kid + struct.pack('>H', len(wrapped_key)) + wrapped_key for kid, wrapped_key in wrapped]
+            + [salt, struct.pack('>I', segment_size)]
+        )
+        associated_data = hashlib.sha256(header).digest()
+        context = aes.AESContext(_envelope_key(session_key, salt), AES.MODE_GCM)
+        destination.write(header)
+        written = len(header)
+
+        reader = aes.as_reader(source)
+        current, following = bytearray(segment_size), bytearray(segment_size)
+        size = aes.read_full(reader, current)
+        index = 0
+        while True:
+            # Lê o segmento seguinte antes de cifrar o atual para saber se este é o último
+            next_size = aes.read_full(reader, following) if size == segment_size else 0
+            last = next_size == 0
+            sealed = context.seal(_segment_nonce(index, last), memoryview(current)[:size], associated_data)
+            destination.write(sealed)
+            written += len(sealed)
+            if last:
+                return written
+            current, following = following, current
+            size = next_size
+            index += 1
+
+    def encrypt_envelope_stream(self, source: aes.StreamSource, destination: BinaryIO,
+                                recipients: Iterable[PublicKeySource], segment_size: int = SEGMENT_SIZE) -> int:
+        """
+        Cifra um fluxo de tamanho arbitrário para um ou mais destinatários.
+
+        Uma chave de sessão AES aleatória é cifrada com RSA-OAEP para cada destinatário, e o
+        conteúdo é cifrado com AES-GCM em segmentos autenticados, com memória constante.
+
+        :param source: Arquivo binário, bytes ou iterável de bytes com o conteúdo.
+        :param destination: Objeto com write que recebe o envelope.
+        :param recipients: As chaves públicas dos destinatários (importadas ou em PEM/DER).
+        :param segment_size: Tamanho de cada segmento cifrado.
+        :return: Quantidade de bytes escritos.
+        """
+        return self.__encrypt_envelope_stream(source, destination, self.__new_session(recipients), segment_size)
+
+    def encrypt_envelope(self, message: bytes, recipients: Iterable[PublicKeySource]) -> bytes:
+        """
+        Cifra uma mensagem (sem limite de tamanho) para um ou mais destinatários.
+
+        :param message: A mensagem em bytes.
+        :param recipients: As chaves públicas dos destinatários (importadas ou em PEM/DER).
+        :return: O envelope em bytes.
+        """
+        output = io.BytesIO()
+        self.encrypt_envelope_stream(message, output, recipients)
+        return output.getvalue()
+
+    def encrypt_envelopes(self, messages: Iterable[bytes], recipients: Iterable[PublicKeySource]) -> list[bytes]:
+        """
+        Cifra um lote de mensagens reutilizando a mesma chave de sessão, de modo que o custo RSA
+        (uma cifragem por destinatário) é pago uma única vez por lote. Cada envelope continua
+        independente, cifrado com uma chave derivada da de sessão e de um sal aleatório próprio.
+
+        :param messages: As mensagens em bytes.
+        :param recipients: As chaves públicas dos destinatários (importadas ou em PEM/DER).
+        :return: Os envelopes, na ordem das mensagens.
+        """
+        session = self.__new_session(recipients)
+        envelopes = []
+        for message in messages:
+            output = io.BytesIO()
+            self.__encrypt_envelope_stream(message, output, session, SEGMENT_SIZE)
+            envelopes.append(output.getvalue())
+        return envelopes
+
+    def __unwrap_session_key(self, wrapped: list[tuple[bytes, bytes]]) -> bytes:
+        """
+        Decifra a chave de sessão endereçada a esta instância (com cache por chave cifrada).
+        """
+        own_id = get_recipient(self.public_key).key_id
+        for kid, wrapped_key in wrapped:
+            if kid != own_id:
+                continue
+            session_key = self.__session_keys.get(wrapped_key)
+            if session_key is None:
+                session_key = self.cipher.decrypt(wrapped_key)
+                self.__session_keys.put(wrapped_key, session_key)
+            return session_key
+        raise ValueError('O envelope não é endereçado a esta chave')
+
+    def decrypt_envelope_stream(self, source: aes.StreamSource, destination: BinaryIO) -> int:
+        """
+        Decifra um envelope, escrevendo o conteúdo no destino segmento a segmento.
+
+        Cada segmento é autenticado antes de ser escrito; truncamentos e alterações geram ValueError.
+
+        :param source: Arquivo binário, bytes ou iterável de bytes com o envelope.
+        :param destination: Objeto com write que recebe o conteúdo.
+        :return: Quantidade de bytes escritos.
+        """
+        reader = aes.as_reader(source)
+        header = [_read_exact(reader, len(ENVELOPE_MAGIC) + 2)]
+        if header[0][:len(ENVELOPE_MAGIC)] != ENVELOPE_MAGIC:
+            raise ValueError('Formato de envelope desconhecido')
+        wrapped = []
+        for _ in range(struct.unpack('>H', header[0][len(ENVELOPE_MAGIC):])[0]):
+            entry = _read_exact(reader, KEY_ID_SIZE + 2)
+            wrapped_key = _read_exact(reader, struct.unpack('>H', entry[KEY_ID_SIZE:])[0])
+            wrapped.append((entry[:KEY_ID_SIZE], wrapped_key))
+            header += [entry, wrapped_key]
+        tail = _read_exact(reader, SALT_SIZE + 4)
+        header.append(tail)
+        salt, segment_size = tail[:SALT_SIZE], struct.unpack('>I', tail[SALT_SIZE:])[0]
+        if not 0 < segment_size <= MAX_SEGMENT_SIZE:
+            raise ValueError('Tamanho de segmento inválido no envelope')
+
+        associated_data = hashlib.sha256(b''.join(header)).digest()
+        context = aes.AESContext(_envelope_key(self.__unwrap_session_key(wrapped), salt), AES.MODE_GCM)
+        sealed_size = segment_size + aes.TAG_SIZE
+        current, following = bytearray(sealed_size), bytearray(sealed_size)
+        size = aes.read_full(reader, current)
+        written = index = 0
+        while True:
+            next_size = aes.read_full(reader, following) if size == sealed_size else 0
+            last = next_size == 0
+            if size < aes.TAG_SIZE:
+                raise ValueError('Envelope truncado')
+            plaintext = context.unseal(_segment_nonce(index, last), memoryview(current)[:size],
+                                       associated_data)
+            destination.write(plaintext)
+            written += len(plaintext)
+            if last:
+                return written
+            current, following = following, current
+            size = next_size
+            index += 1
+
+    def decrypt_envelope(self, envelope: bytes) -> bytes:
+        """
+        Decifra um envelope produzido por encrypt_envelope ou encrypt_envelopes.
+
+        :param envelope: O envelope em bytes.
+        :return: A mensagem em bytes.
+        """
+        output = io.BytesIO()
+        self.decrypt_envelope_stream(envelope, output)
+        return output.getvalue()
+
+    def decrypt_envelopes(self, envelopes: Iterable[bytes]) -> list[bytes]:
+        """
+        Decifra um lote de envelopes; envelopes que compartilham a chave de sessão custam uma
+        única decifragem RSA.
+
+        :param envelopes: Os envelopes em bytes.
+        :return: As mensagens, na ordem dos envelopes.
+        """
+        return [self.decrypt_envelope(envelope) for envelope in envelopes]
@@ -1,24 +1,169 @@
 """AES Wrapper implementation"""
 
 import binascii
+import mmap
+import os
+from typing import TYPE_CHECKING, BinaryIO, Iterable, Iterator, Union
+
 from Cryptodome.Cipher import AES
+from Cryptodome.Random import get_random_bytes
 from Cryptodome.Util.Padding import pad, unpad
 
+from cache import LRUCache
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
 KEYS_BY_SIZE = {
     "128": bytes.fromhex('637572736F63727970746F6772616679'),
     "192": bytes.fromhex('637572736F63727970746F6772616679637572736F637279'),
     "256": bytes.fromhex('637572736F63727970746F6772616679637572736F63727970746F6772616679')
 }
 
+NONCE = bytes(8)
+IV = bytes(16)
+
+# Tamanho padrão dos blocos lidos nos modos de fluxo (múltiplo do bloco AES)
+CHUNK_SIZE = 1024 * 1024
+# Tamanho do intervalo processado por cada tarefa do modo paralelo
+PARALLEL_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Tamanho do nonce e da etiqueta de autenticação no modo GCM
+GCM_NONCE_SIZE = 12
+TAG_SIZE = 16
+
+# Quantidade máxima de contextos (chave, modo) mantidos em cache
+CONTEXT_CACHE_SIZE = 256
+
+StreamSource = Union[BinaryIO, bytes, bytearray, memoryview, mmap.mmap, Iterable[bytes]]
+
+
+class _IterableReader:
+    """Adapta um iterável de blocos de bytes à interface readinto de arquivos"""
+    def __init__(self, chunks: Iterable[bytes]):
+        self.__chunks = iter(chunks)
+        self.__pending = memoryview(b'')
+
+    def readinto(self, buffer: memoryview) -> int:
+        """Copia para o buffer o próximo trecho disponível, sem concatenar blocos"""
+        while not self.__pending:
+            chunk = next(self.__chunks, None)
+            if chunk is None:
+                return 0
+            self.__pending = memoryview(chunk).cast('B')
+        size = min(len(buffer), len(self.__pending))
+        buffer[:size] = self.__pending[:size]
+        self.__pending = self.__pending[size:]
+        return size
+
+
+def as_reader(source: StreamSource):
+    """Retorna um objeto com readinto para a origem informada"""
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        return _IterableReader([source])
+    if hasattr(source, 'readinto'):
+        return source
+    return _IterableReader(source)
+
+
+def read_full(reader, buffer: bytearray) -> int:
+    """Preenche o buffer até o fim ou até o término da origem
+
+    Returns:
+        quantidade de bytes lidos (menor que o buffer apenas no fim do fluxo)
+    """
+    view = memoryview(buffer)
+    total = 0
+    while total < len(view):
+        read = reader.readinto(view[total:])
+        if not read:
+            break
+        total += read
+    return total
+
+
+class AESContext:
+    """Contexto reutilizável para uma chave e um modo de operação
+
+    Cada mensagem recebe um IV/nonce aleatório próprio, que é prefixado ao texto
+    cifrado. No modo ECB, que não guarda estado, a mesma cifra (e a expansão de
+    chave) é reaproveitada entre as mensagens. No modo GCM a etiqueta de
+    autenticação é anexada ao texto cifrado.
+    """
+    def __init__(self, key: bytes, mode: int):
+        self.key = key
+        self.mode = mode
+        self.padded = mode in [AES.MODE_CBC, AES.MODE_ECB]
+        self.iv_size = 0
+        if mode in [AES.MODE_CBC, AES.MODE_OFB, AES.MODE_CFB]:
+            self.iv_size = 16
+        elif mode == AES.MODE_CTR:
+            self.iv_size = len(NONCE)
+        elif mode == AES.MODE_GCM:
+            self.iv_size = GCM_NONCE_SIZE
+        self.__ecb = AES.new(key=key, mode=mode) if mode == AES.MODE_ECB else None
+
+    def new_cipher(self, iv: bytes = b''):
+        """Cria a cifra de uma mensagem a partir do seu IV/nonce"""
+        if self.__ecb is not None:
+            return self.__ecb
+        if self.mode in [AES.MODE_CTR, AES.MODE_GCM]:
+            return AES.new(key=self.key, mode=self.mode, nonce=iv)
+        return AES.new(key=self.key, mode=self.mode, iv=iv)
+
+    def seal(self, nonce: bytes, plaintext: Union[bytes, memoryview], associated_data: bytes = b'') -> bytes:
+        """Cifra e autentica (GCM) com o nonce informado, retornando texto cifrado + etiqueta"""
+        cipher = self.new_cipher(nonce)
+        cipher.update(associated_data)
+        ciphertext, tag = cipher.encrypt_and_digest(plaintext)
+        return ciphertext + tag
+
+    def unseal(self, nonce: bytes, data: Union[bytes, memoryview], associated_data: bytes = b'') -> bytes:
+        """Verifica e decifra (GCM) texto cifrado + etiqueta
+
+        Raises:
+            ValueError: se a etiqueta não confere (dados ou dados associados alterados)
+        """
+        data = memoryview(data)
+        cipher = self.new_cipher(nonce)
+        cipher.update(associated_data)
+        return cipher.decrypt_and_verify(data[:-TAG_SIZE], data[-TAG_SIZE:])
+
+    def encrypt(self, plaintext: Union[bytes, memoryview]) -> bytes:
+        """Cifra uma mensagem com IV/nonce novo, retornando IV/nonce + texto cifrado"""
+        iv = get_random_bytes(self.iv_size) if self.iv_size else b''
+        if self.mode == AES.MODE_GCM:
+            return iv + self.seal(iv, plaintext)
+        if self.padded:
+            plaintext = pad(bytes(plaintext), 16)
+        return iv + self.new_cipher(iv).encrypt(plaintext)
+
+    def decrypt(self, data: Union[bytes, memoryview]) -> bytes:
+        """Decifra uma mensagem no formato IV/nonce + texto cifrado"""
+        data = memoryview(data)
+        if self.mode == AES.MODE_GCM:
+            return self.unseal(bytes(data[:self.iv_size]), data[self.iv_size:])
+        deciphered = self.new_cipher(bytes(data[:self.iv_size])).decrypt(data[self.iv_size:])
+        return unpad(deciphered, 16) if self.padded else deciphered
+
+
+CONTEXT_CACHE = LRUCache(CONTEXT_CACHE_SIZE)
+
+
+def get_context(key: bytes, mode: int) -> AESContext:
+    """Retorna o contexto em cache para (chave, modo), criando-o se necessário"""
+    return CONTEXT_CACHE.get_or_create((bytes(key), mode), lambda: AESContext(bytes(key), mode))
+
 
 class AESWrapper:
     """Wrapper que encapsula os métodos fornecidos pela biblioteca Cryptodome"""
     def __init__(self, key_size: str, mode: str):
         self.mode = getattr(AES, f'MODE_{mode}')
 
-        nonce = bytes(8)
-        iv = bytes(16)
+        nonce = NONCE
+        iv = IV
         key = KEYS_BY_SIZE[key_size]
+        self.context = get_context(key, self.mode)
 
         self.cipher = AES.new(key=key, mode=self.mode)
         if self.mode in [AES.MODE_CBC, AES.MODE_OFB]:
@@ -41,11 +186,209 @@ class AESWrapper:
             deciphered = unpad(deciphered, 16)
         return deciphered.decode()
 
+    def encrypt_many(self, messages: Iterable[Union[bytes, memoryview]]) -> 'list[bytes]':
+        """Cifra um lote de mensagens independentes, cada uma com IV/nonce próprio
+
+        Diferente de encrypt, não altera o estado de self.cipher e trabalha com
+        bytes crus (sem codificação de texto nem hexadecimal).
+
+        Returns:
+            lista com IV/nonce + texto cifrado de cada mensagem, na mesma ordem
+        """
+        encrypt = self.context.encrypt
+        return [encrypt(message) for message in messages]
+
+    def decrypt_many(self, messages: Iterable[Union[bytes, memoryview]]) -> 'list[bytes]':
+        """Decifra um lote de mensagens produzidas por encrypt_many"""
+        decrypt = self.context.decrypt
+        return [decrypt(message) for message in messages]
+
+    def __process_stream(self, source: StreamSource, chunk_size: int, encrypting: bool) -> Iterator[memoryview]:
+        """Processa a origem em blocos de tamanho fixo, usando sempre os mesmos buffers
+
+        O bloco produzido é uma visão de um buffer reutilizado, válida apenas até a
+        próxima iteração. O preenchimento (CBC/ECB) é tratado somente no último bloco.
+        """
+        if chunk_size <= 0 or chunk_size % 16:
+            raise ValueError('chunk_size deve ser um múltiplo positivo de 16')
+
+        reader = as_reader(source)
+        operation = self.cipher.encrypt if encrypting else self.cipher.decrypt
+        padded = self.mode in [AES.MODE_CBC, AES.MODE_ECB]
+
+        current, following = bytearray(chunk_size), bytearray(chunk_size)
+        output = memoryview(bytearray(chunk_size))
+        size = read_full(reader, current)
+        while True:
+            # Lê o bloco seguinte antes de processar o atual para saber se este é o último
+            next_size = read_full(reader, following) if size == chunk_size else 0
+            view = memoryview(current)[:size]
+            if next_size == 0 and padded:
+                if encrypting:
+                    yield memoryview(operation(pad(bytes(view), 16)))
+                else:
+                    yield memoryview(unpad(operation(view), 16))
+                return
+            if size:
+                operation(view, output=output[:size])
+                yield output[:size]
+            if next_size == 0:
+                return
+            current, following = following, current
+            size = next_size
+
+    def encrypt_stream(self, source: StreamSource, destination: BinaryIO, chunk_size: int = CHUNK_SIZE) -> int:
+        """Cifra um fluxo em blocos de tamanho fixo, escrevendo bytes crus no destino
+
+        Args:
+            source: arquivo binário (readinto), bytes/mmap ou iterável de bytes
+            destination: objeto com write que recebe o texto cifrado
+            chunk_size: tamanho de cada bloco lido (múltiplo de 16)
+        Returns:
+            quantidade de bytes escritos
+        """
+        written = 0
+        for block in self.__process_stream(source, chunk_size, encrypting=True):
+            destination.write(block)
+            written += len(block)
+        return written
+
+    def decrypt_stream(self, source: StreamSource, destination: BinaryIO, chunk_size: int = CHUNK_SIZE) -> int:
+        """Decifra um fluxo de bytes crus em blocos de tamanho fixo, escrevendo no destino
+
+        Returns:
+            quantidade de bytes escritos
+        """
+        written = 0
+        for block in self.__process_stream(source, chunk_size, encrypting=False):
+            destination.write(block)
+            written += len(block)
+        return written
+
+    def iter_encrypt(self, source: StreamSource, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Cifra a origem devolvendo o texto cifrado bloco a bloco"""
+        for block in self.__process_stream(source, chunk_size, encrypting=True):
+            yield bytes(block)
+
+    def iter_decrypt(self, source: StreamSource, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Decifra a origem devolvendo o texto plano bloco a bloco"""
+        for block in self.__process_stream(source, chunk_size, encrypting=False):
+            yield bytes(block)
+
+
+def _new_range_cipher(key: bytes, mode: int, start: int):
+    """Cria uma cifra posicionada no bloco inicial de um intervalo (CTR ou ECB)"""
+    if mode == AES.MODE_CTR:
+        return AES.new(key=key, mode=mode, nonce=NONCE, initial_value=start // 16)
+    return AES.new(key=key, mode=mode)
+
+
+def _process_shared_range(key: bytes, mode: int, encrypting: bool,
+                          input_name: str, output_name: str, start: int, end: int) -> None:
+    """Processa o intervalo [start, end) da memória compartilhada de entrada na de saída"""
+    from multiprocessing import shared_memory
+    source = shared_memory.SharedMemory(name=input_name)
+    target = shared_memory.SharedMemory(name=output_name)
+    try:
+        cipher = _new_range_cipher(key, mode, start)
+        operation = cipher.encrypt if encrypting else cipher.decrypt
+        with source.buf[start:end] as data, target.buf[start:end] as output:
+            operation(data, output=output)
+    finally:
+        source.close()
+        target.close()
+
+
+class ParallelAES:
+    """Cifra grandes volumes em paralelo nos modos CTR e ECB
+
+    A entrada é copiada uma única vez para memória compartilhada e cada processo
+    trabalha sobre um intervalo de blocos, calculando o contador inicial (CTR) a
+    partir do deslocamento do intervalo. A saída é idêntica à do AESWrapper serial.
+    """
+    def __init__(self, key_size: str, mode: str, workers: int = None, chunk_size: int = PARALLEL_CHUNK_SIZE):
+        if mode not in ['CTR', 'ECB']:
+            raise ValueError('O modo paralelo suporta apenas CTR e ECB')
+        if chunk_size <= 0 or chunk_size % 16:
+            raise ValueError('chunk_size deve ser um múltiplo positivo de 16')
+
+        self.mode = getattr(AES, f'MODE_{mode}')
+        self.key = KEYS_BY_SIZE[key_size]
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.__executor = None
+
+    def __enter__(self) -> 'ParallelAES':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Encerra o pool de processos, se tiver sido criado"""
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+
+    def __get_executor(self) -> 'ProcessPoolExecutor':
+        from concurrent.futures import ProcessPoolExecutor
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self.__executor
+
+    def __run(self, data: bytes, encrypting: bool) -> bytearray:
+        """Aplica a cifra a dados de tamanho múltiplo de 16 (exceto no CTR)"""
+        size = len(data)
+        if self.workers == 1 or size <= self.chunk_size:
+            output = bytearray(size)
+            cipher = _new_range_cipher(self.key, self.mode, 0)
+            (cipher.encrypt if encrypting else cipher.decrypt)(data, output=output)
+            return output
+
+        # Importado aqui: multiprocessing só é necessário no caminho paralelo
+        from multiprocessing import shared_memory
+        source = shared_memory.SharedMemory(create=True, size=size)
+        target = shared_memory.SharedMemory(create=True, size=size)
+        try:
+            source.buf[:size] = data
+            executor = self.__get_executor()
+            futures = [
+                executor.submit(_process_shared_range, self.key, self.mode, encrypting,
+                                source.name, target.name, start, min(start + self.chunk_size, size))
+                for start in range(0, size, self.chunk_size)
+            ]
+            for future in futures:
+                future.result()
+            return bytearray(target.buf[:size])
+        finally:
+            source.close()
+            source.unlink()
+            target.close()
+            target.unlink()
+
+    def encrypt(self, plaintext: bytes) -> bytes:
+        """Cifra bytes crus, retornando o texto cifrado sem codificação hexadecimal"""
+        if self.mode == AES.MODE_ECB:
+            plaintext = pad(bytes(plaintext), 16)
+        return bytes(self.__run(plaintext, encrypting=True))
+
+    def decrypt(self, ciphertext: bytes) -> bytes:
+        """Decifra bytes crus produzidos por encrypt (ou pelo AESWrapper serial)"""
+        if self.mode == AES.MODE_ECB and len(ciphertext) % 16:
+            raise ValueError('Texto cifrado em ECB deve ter tamanho múltiplo de 16')
+        deciphered = self.__run(ciphertext, encrypting=False)
+        if self.mode == AES.MODE_ECB:
+            # Remove o preenchimento verificando apenas o último bloco
+            last_block = unpad(bytes(deciphered[-16:]), 16)
+            del deciphered[len(deciphered) - 16 + len(last_block):]
+        return bytes(deciphered)
+
 
-MODE = input()
-KEY_SIZE = input()
-ACTION = input()
-TEXT = input()
+if __name__ == '__main__':
+    MODE = input()
+    KEY_SIZE = input()
+    ACTION = input()
+    TEXT = input()
 
-aes_wrapper = AESWrapper(KEY_SIZE, MODE)
-print(aes_wrapper.encrypt(TEXT) if ACTION == 'E' else aes_wrapper.decrypt(TEXT))
+    aes_wrapper = AESWrapper(KEY_SIZE, MODE)
+    print(aes_wrapper.encrypt(TEXT) if ACTION == 'E' else aes_wrapper.decrypt(TEXT))
@@ -0,0 +1 @@
+"""Benchmarks dos módulos de criptografia (executar a partir da raiz do repositório)"""
@@ -0,0 +1,55 @@
+"""Tempo de inicialização e registros/s do modo em lote (cli.py)
+
+Compara, para cada operação, um processo por registro (os drivers de stdin de
+vigenere_cipher.py, miller_rabin.py e aes.py) com um único processo cli.py
+atendendo --count registros.
+
+Uso: python -m benchmarks.bench_cli [--count N] [--processes P]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (operação, script e entrada do driver de um processo por registro, registro do cli.py)
+CASES = [
+    ('vigenere', 'vigenere_cipher.py', 'ATTACKATDAWN\nLEMON\nc\n',
+     {'op': 'vigenere', 'action': 'cipher', 'text': 'ATTACKATDAWN', 'key': 'LEMON'}),
+    ('primality', 'miller_rabin.py', '1000000007\n',
+     {'op': 'primality', 'n': 1000000007}),
+    ('aes', 'aes.py', 'CTR\n256\nE\ncurso de criptografia\n',
+     {'op': 'aes', 'action': 'E', 'mode': 'CTR', 'key_size': '256', 'text': 'curso de criptografia'}),
+]
+
+
+def run_process(arguments: 'list[str]', stdin: str) -> float:
+    """Executa um processo Python na raiz do repositório, retornando o tempo decorrido"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *arguments], input=stdin, cwd=ROOT, text=True,
+                   stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument('--processes', type=int, default=20, help='processos medidos no modo um por registro')
+    args = parser.parse_args()
+
+    startup = min(run_process(['cli.py'], '') for _ in range(5))
+    print(f'inicialização do cli.py (entrada vazia): {startup * 1000:.1f} ms')
+    print(f"{'operação':>10} {'1ª linha (ms)':>14} {'1 processo/registro':>20} {'cli.py':>12}")
+    for op, script, driver_input, record in CASES:
+        first = min(run_process(['cli.py'], json.dumps(record) + '\n') for _ in range(5))
+        per_process = args.processes / sum(run_process([script], driver_input) for _ in range(args.processes))
+        batch = args.count / run_process(['cli.py'], (json.dumps(record) + '\n') * args.count)
+        print(f'{op:>10} {first * 1000:>14.1f} {per_process:>18,.1f}/s {batch:>10,.0f}/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Compara a vazão (candidatos/s) de MillerRabin.test_many com test_for_many_a
+
+Uso: python -m benchmarks.bench_miller_rabin [--count N] [--bits 32 64 128]
+"""
+
+import argparse
+import random
+import time
+
+from miller_rabin import MillerRabin
+
+
+def random_odd_candidates(count: int, bits: int, seed: int = 0) -> 'list[int]':
+    """Gera candidatos ímpares com exatamente `bits` bits"""
+    rng = random.Random(seed)
+    top = 1 << (bits - 1)
+    return [rng.getrandbits(bits) | top | 1 for _ in range(count)]
+
+
+def bench_per_number(candidates: 'list[int]') -> float:
+    """Candidatos/s testando um número por vez com test_for_many_a"""
+    miller = MillerRabin()
+    start = time.perf_counter()
+    for n in candidates:
+        miller.test_for_many_a(n)
+    return len(candidates) / (time.perf_counter() - start)
+
+
+def bench_batch(candidates: 'list[int]') -> float:
+    """Candidatos/s consumindo o gerador de test_many"""
+    miller = MillerRabin()
+    start = time.perf_counter()
+    for _ in miller.test_many(candidates):
+        pass
+    return len(candidates) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=100_000)
+    parser.add_argument('--bits', type=int, nargs='+', default=[32, 64, 128, 256])
+    args = parser.parse_args()
+
+    print(f"{'bits':>6} {'test_for_many_a':>18} {'test_many':>14} {'ganho':>8}")
+    for bits in args.bits:
+        candidates = random_odd_candidates(args.count, bits)
+        per_number = bench_per_number(candidates)
+        batch = bench_batch(candidates)
+        print(f"{bits:>6} {per_number:>16,.0f}/s {batch:>12,.0f}/s {batch / per_number:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
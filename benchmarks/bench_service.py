@@ -0,0 +1,120 @@
+"""Gerador de carga do crypto_service: latência p50/p99 e operações/s por operação
+
+Sem --socket, inicia um serviço local em um subprocesso e o encerra ao final.
+Cada conexão mantém --concurrency requisições em andamento.
+
+Uso: python -m benchmarks.bench_service [--socket PATH] [--ops sign verify ...]
+     [--count N] [--connections C] [--concurrency K]
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from base64 import b64encode
+
+from crypto_service import THREAD_OPERATIONS, PROCESS_OPERATIONS, CryptoClient
+
+PAYLOAD_SIZE = 64
+
+
+async def prepare(client: CryptoClient) -> dict:
+    """Monta uma requisição válida para cada operação a partir das chaves do serviço"""
+    info = await client.request('info')
+    data = b64encode(os.urandom(PAYLOAD_SIZE)).decode()
+    signed = await client.request('sign', data=data)
+    rsa_encrypted = await client.request('rsa_encrypt', data=data)
+    aes_encrypted = await client.request('aes_encrypt', data=data)
+    return {
+        'sign': {'data': data},
+        'verify': {'data': data, 'signature': signed['signature']},
+        'rsa_encrypt': {'data': data, 'public_key': info['rsa_public_key']},
+        'rsa_decrypt': {'ciphertext': rsa_encrypted['ciphertext']},
+        'aes_encrypt': {'data': data},
+        'aes_decrypt': {'ciphertext': aes_encrypted['ciphertext']},
+        'validate': {'certificate': info['ca_certificate']},
+    }
+
+
+async def run_connection(path: str, op: str, fields: dict, count: int, concurrency: int,
+                         latencies: 'list[float]') -> None:
+    """Envia count requisições com até concurrency em andamento, registrando as latências"""
+    remaining = count
+
+    async def worker(client: CryptoClient) -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await client.request(op, **fields)
+            latencies.append(time.perf_counter() - start)
+            if 'error' in response:
+                raise RuntimeError(f"{op}: {response['error']}")
+
+    async with CryptoClient(path) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+
+
+def percentile(values: 'list[float]', fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def bench(args: argparse.Namespace, path: str) -> None:
+    async with CryptoClient(path) as client:
+        requests = await prepare(client)
+
+    print(f"{'operação':>12} {'ops/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    per_connection = max(1, args.count // args.connections)
+    for op in args.ops:
+        latencies = []
+        start = time.perf_counter()
+        await asyncio.gather(*(run_connection(path, op, requests[op], per_connection, args.concurrency, latencies)
+                               for _ in range(args.connections)))
+        elapsed = time.perf_counter() - start
+        print(f"{op:>12} {len(latencies) / elapsed:>10,.0f} {percentile(latencies, 0.50) * 1000:>10.2f} "
+              f"{percentile(latencies, 0.99) * 1000:>10.2f}")
+
+
+async def wait_for_socket(path: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if process.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError('O serviço não iniciou')
+        await asyncio.sleep(0.05)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--socket', default=None)
+    parser.add_argument('--ops', nargs='+', choices=PROCESS_OPERATIONS + THREAD_OPERATIONS,
+                        default=list(PROCESS_OPERATIONS + THREAD_OPERATIONS))
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--connections', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=None, help='processos do serviço iniciado localmente')
+    args = parser.parse_args()
+
+    if args.socket is not None:
+        asyncio.run(bench(args, args.socket))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'crypto_service.sock')
+        command = [sys.executable, '-m', 'crypto_service', '--socket', path]
+        if args.workers is not None:
+            command += ['--workers', str(args.workers)]
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+        try:
+            asyncio.run(wait_for_socket(path, process))
+            asyncio.run(bench(args, path))
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Assinaturas/s e verificações/s por algoritmo e tamanho de chave em sign_lib
+
+Compara sign_message/verify_signature (uma chamada por mensagem) com
+sign_many/verify_many no processo atual e em um pool de processos.
+
+Uso: python -m benchmarks.bench_sign [--count N] [--workers W]
+"""
+
+import argparse
+import os
+import time
+
+from sign_lib import DSA, ECDSA, RSA
+
+CASES = [
+    ('RSA', '2048', lambda: RSA(2048)),
+    ('RSA', '3072', lambda: RSA(3072)),
+    ('DSA', '2048', lambda: DSA(2048)),
+    ('ECDSA', 'P-256', lambda: ECDSA('P-256')),
+    ('ECDSA', 'P-384', lambda: ECDSA('P-384')),
+]
+
+
+def rate(count: int, function) -> float:
+    start = time.perf_counter()
+    function()
+    return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    messages = [os.urandom(256) for _ in range(args.count)]
+    texts = [message.hex() for message in messages]
+    print(f"{'algoritmo':>9} {'chave':>7} {'sign_message':>13} {'sign_many':>10} "
+          f"{'pool':>10} {'verify_many':>12} {'pool':>10}")
+    for algorithm, key, factory in CASES:
+        signer = factory()
+        single = rate(args.count, lambda: [signer.sign_message(text) for text in texts])
+        batch = rate(args.count, lambda: signer.sign_many(messages, encode=False))
+        pool = rate(args.count, lambda: signer.sign_many(messages, encode=False, workers=args.workers))
+        signatures = signer.sign_many(messages, encode=False)
+        verify = rate(args.count, lambda: signer.verify_many(messages, signatures, signer.public_key,
+                                                             encoded=False))
+        verify_pool = rate(args.count, lambda: signer.verify_many(messages, signatures, signer.public_key,
+                                                                  encoded=False, workers=args.workers))
+        print(f"{algorithm:>9} {key:>7} {single:>11,.0f}/s {batch:>8,.0f}/s "
+              f"{pool:>8,.0f}/s {verify:>10,.0f}/s {verify_pool:>8,.0f}/s")
+
+
+if __name__ == '__main__':
+    main()
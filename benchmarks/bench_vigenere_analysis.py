@@ -0,0 +1,50 @@
+"""Tempo de recuperação de chaves de Vigenère por tamanho de texto e de chave
+
+Os textos são sintéticos, sorteando letras com as frequências do inglês.
+
+Uso: python -m benchmarks.bench_vigenere_analysis [--sizes 65536 1048576] [--key-lengths 3 7 13]
+"""
+
+import argparse
+import random
+import string
+import time
+
+from vigenere_analysis import ENGLISH_FREQUENCIES, VigenereCryptanalysis
+from vigenere_cipher import VigenereCipher
+
+
+def synthetic_text(size: int, rng: random.Random) -> str:
+    """Texto com letras sorteadas segundo as frequências do inglês"""
+    return ''.join(rng.choices(string.ascii_uppercase, weights=ENGLISH_FREQUENCIES, k=size))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64 * 1024, 1024 * 1024, 4 * 1024 * 1024])
+    parser.add_argument('--key-lengths', type=int, nargs='+', default=[3, 7, 13, 19])
+    parser.add_argument('--max-key-length', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'tamanho':>10} {'chave':>6} {'comprimento (s)':>16} {'chave (s)':>10} {'MB/s':>8} {'ok':>4}")
+    for size in args.sizes:
+        plain_text = synthetic_text(size, rng)
+        for key_length in args.key_lengths:
+            key = ''.join(rng.choices(string.ascii_uppercase, k=key_length))
+            ciphertext = VigenereCipher.cipher(plain_text, key)
+
+            start = time.perf_counter()
+            estimated = VigenereCryptanalysis.estimate_key_length(ciphertext, args.max_key_length)
+            middle = time.perf_counter()
+            recovered = VigenereCryptanalysis.recover_key(ciphertext, estimated)
+            end = time.perf_counter()
+
+            throughput = size / (end - start) / 1e6
+            print(f"{size:>10} {key_length:>6} {middle - start:>16.3f} {end - middle:>10.3f}"
+                  f" {throughput:>8.1f} {'sim' if recovered == key else 'não':>4}")
+
+
+if __name__ == '__main__':
+    main()
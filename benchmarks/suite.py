@@ -0,0 +1,243 @@
+"""Suíte de benchmarks de todos os caminhos críticos, com comparação contra uma linha de base
+
+Mede primalidade por tamanho em bits, Vigenère e AES em MB/s, assinatura/verificação
+por algoritmo, emissão/validação de certificados e latência de geração de chaves.
+Cada medida é repetida --repeat vezes e o melhor resultado é mantido.
+
+Os resultados são escritos em JSON (--output, ou stdout com --json). Com uma linha de
+base (--baseline, padrão benchmarks/baseline.json), cada medida é comparada e o processo
+termina com código 1 se alguma piorar mais que --threshold. A linha de base é específica
+da máquina e não é versionada: gere-a com --save-baseline antes da mudança a avaliar.
+
+Uso: python -m benchmarks.suite [--only aes sign] [--quick] [--save-baseline]
+     [--baseline PATH] [--threshold 0.10] [--output resultados.json]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import string
+import sys
+import time
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+# Piora relativa tolerada antes de acusar regressão
+DEFAULT_THRESHOLD = 0.10
+
+
+def best_rate(repeat: int, amount: float, function) -> float:
+    """Maior vazão (amount por segundo) entre repeat execuções de function"""
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = max(best, amount / (time.perf_counter() - start))
+    return best
+
+
+def best_latency(repeat: int, function) -> float:
+    """Menor tempo em milissegundos entre repeat execuções de function"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def rate(value: float, unit: str) -> dict:
+    return {'value': value, 'unit': unit, 'higher_is_better': True}
+
+
+def latency(value: float) -> dict:
+    return {'value': value, 'unit': 'ms', 'higher_is_better': False}
+
+
+def bench_primality(scale: float, repeat: int) -> dict:
+    from miller_rabin import is_probable_prime
+    rng = random.Random(0)
+    results = {}
+    for bits in (64, 256, 1024, 2048):
+        count = max(10, int(20000 * scale * 64 / bits))
+        candidates = [rng.getrandbits(bits) | (1 << (bits - 1)) | 1 for _ in range(count)]
+        results[f'primality.{bits}'] = rate(
+            best_rate(repeat, count, lambda: [is_probable_prime(n) for n in candidates]), 'candidatos/s')
+    return results
+
+
+def bench_vigenere(scale: float, repeat: int) -> dict:
+    from vigenere_cipher import VigenereCipher
+    size = max(1 << 16, int((4 << 20) * scale))
+    text = ''.join(random.Random(0).choices(string.ascii_uppercase, k=size))
+    key = 'CRIPTOGRAFIA'
+    ciphered = VigenereCipher.cipher(text, key)
+    return {
+        'vigenere.cipher': rate(best_rate(repeat, size / 1e6, lambda: VigenereCipher.cipher(text, key)), 'MB/s'),
+        'vigenere.decipher': rate(best_rate(repeat, size / 1e6, lambda: VigenereCipher.decipher(ciphered, key)),
+                                  'MB/s'),
+    }
+
+
+def bench_aes(scale: float, repeat: int) -> dict:
+    from aes import AESWrapper
+    message_size = 64 * 1024
+    messages = [os.urandom(message_size)] * max(4, int(256 * scale))
+    total = message_size * len(messages) / 1e6
+    results = {}
+    for mode in ('ECB', 'CBC', 'CTR', 'GCM'):
+        for key_size in ('128', '256'):
+            aes_wrapper = AESWrapper(key_size, mode)
+            ciphered = aes_wrapper.encrypt_many(messages)
+            results[f'aes.{mode}-{key_size}.encrypt'] = rate(
+                best_rate(repeat, total, lambda: aes_wrapper.encrypt_many(messages)), 'MB/s')
+            results[f'aes.{mode}-{key_size}.decrypt'] = rate(
+                best_rate(repeat, total, lambda: aes_wrapper.decrypt_many(ciphered)), 'MB/s')
+    return results
+
+
+def bench_sign(scale: float, repeat: int) -> dict:
+    import sign_lib
+    messages = [os.urandom(256) for _ in range(max(10, int(500 * scale)))]
+    results = {}
+    for label, factory in (('RSA-2048', lambda: sign_lib.RSA(2048)),
+                           ('DSA-2048', lambda: sign_lib.DSA(2048)),
+                           ('ECDSA-P-256', lambda: sign_lib.ECDSA('P-256'))):
+        signer = factory()
+        signatures = signer.sign_many(messages, encode=False)
+        results[f'sign.{label}'] = rate(
+            best_rate(repeat, len(messages), lambda: signer.sign_many(messages, encode=False)), 'ops/s')
+        results[f'verify.{label}'] = rate(
+            best_rate(repeat, len(messages),
+                      lambda: signer.verify_many(messages, signatures, signer.public_key, encoded=False)), 'ops/s')
+    return results
+
+
+def bench_certificates(scale: float, repeat: int) -> dict:
+    from cryptography import x509
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from AC import AC
+    count = max(10, int(300 * scale))
+    public_key = ec.generate_private_key(ec.SECP256R1()).public_key()
+    subject = ('Benchmark', 'BR', 'SC', 'Fln', 'UFSC')
+
+    issue_rate = 0.0
+    validate_cold = validate_warm = 0.0
+    for _ in range(repeat):
+        # Uma AC nova por repetição: a validação "fria" não encontra nada em cache
+        ac = AC()
+        ac.issueSelfsignedCertificate()
+        start = time.perf_counter()
+        encoded = list(ac.issueEndCertificates([(public_key, subject)] * count, workers=1))
+        issue_rate = max(issue_rate, count / (time.perf_counter() - start))
+        certs = [x509.load_der_x509_certificate(data) for data in encoded]
+        validate_cold = max(validate_cold, best_rate(1, count, lambda: ac.validateCertificates(certs, workers=1)))
+        validate_warm = max(validate_warm, best_rate(1, count, lambda: ac.validateCertificates(certs, workers=1)))
+    return {
+        'certificates.issue': rate(issue_rate, 'certificados/s'),
+        'certificates.validate_cold': rate(validate_cold, 'certificados/s'),
+        'certificates.validate_cached': rate(validate_warm, 'certificados/s'),
+    }
+
+
+def bench_keygen(scale: float, repeat: int) -> dict:
+    from key_pool import generate_key
+    repeat = max(repeat, int(5 * scale))
+    generate_key('DSA', 2048)  # gera (ou carrega) os parâmetros de domínio fora da medida
+    return {
+        f'keygen.{algorithm}-{size}': latency(best_latency(repeat, lambda: generate_key(algorithm, size)))
+        for algorithm, size in (('RSA', 2048), ('DSA', 2048), ('ECDSA', 'P-256'))
+    }
+
+
+BENCHMARKS = {
+    'primality': bench_primality,
+    'vigenere': bench_vigenere,
+    'aes': bench_aes,
+    'sign': bench_sign,
+    'certificates': bench_certificates,
+    'keygen': bench_keygen,
+}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> 'list[str]':
+    """Imprime a variação de cada medida e retorna os nomes das que pioraram além do limite"""
+    regressions = []
+    print(f"{'medida':<34} {'base':>12} {'atual':>12} {'variação':>9}  unidade", file=sys.stderr)
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<34} {'-':>12} {result['value']:>12,.1f} {'nova':>9}  {result['unit']}", file=sys.stderr)
+            continue
+        change = (result['value'] - base['value']) / base['value']
+        worse = -change if result['higher_is_better'] else change
+        flag = ''
+        if worse > threshold:
+            regressions.append(name)
+            flag = '  REGRESSÃO'
+        print(f"{name:<34} {base['value']:>12,.1f} {result['value']:>12,.1f} {change:>+9.1%}  "
+              f"{result['unit']}{flag}", file=sys.stderr)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--quick', action='store_true', help='entradas menores, para verificações rápidas')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='grava os resultados como nova linha de base')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='piora relativa tolerada (0.10 = 10%%)')
+    parser.add_argument('--output', default=None, help='arquivo JSON com os resultados')
+    parser.add_argument('--json', action='store_true', help='escreve os resultados em JSON no stdout')
+    args = parser.parse_args()
+
+    scale = 0.1 if args.quick else 1.0
+    results = {}
+    for name in args.only:
+        print(f'executando {name}...', file=sys.stderr)
+        results.update(BENCHMARKS[name](scale, args.repeat))
+
+    report = {
+        'metadata': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'quick': args.quick,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2)
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2)
+        print(f'linha de base gravada em {args.baseline}', file=sys.stderr)
+        return
+
+    if not os.path.exists(args.baseline):
+        compare(results, {}, args.threshold)
+        print('sem linha de base para comparar (use --save-baseline)', file=sys.stderr)
+        return
+    with open(args.baseline, encoding='utf-8') as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline['metadata'].get('quick') != args.quick:
+        print('aviso: linha de base gerada com outro valor de --quick', file=sys.stderr)
+    regressions = compare(results, baseline['results'], args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regressões acima de {args.threshold:.0%}: {', '.join(regressions)}",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Cache LRU de tamanho limitado, compartilhado pelos módulos de criptografia"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Dicionário com limite de entradas que descarta a menos usada recentemente
+
+    As operações são protegidas por trava, podendo ser usadas por várias threads.
+    """
+    def __init__(self, maxsize: int = 128):
+        if maxsize <= 0:
+            raise ValueError('maxsize deve ser positivo')
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.__entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor associado à chave, marcando-o como usado recentemente"""
+        with self.__lock:
+            try:
+                self.__entries.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return self.__entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Insere ou substitui um valor, descartando o mais antigo se necessário"""
+        with self.__lock:
+            self.__entries[key] = value
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Retorna o valor em cache ou cria, armazena e retorna um novo com factory()"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a entrada, retornando seu valor"""
+        with self.__lock:
+            return self.__entries.pop(key, default)
+
+    def clear(self) -> None:
+        """Remove todas as entradas"""
+        with self.__lock:
+            self.__entries.clear()
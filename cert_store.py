@@ -0,0 +1,295 @@
+"""
+Armazenamento persistente e indexado dos certificados emitidos pela AC.
+"""
+from cryptography import x509
+from cryptography.hazmat.primitives import serialization
+from cryptography.x509.oid import NameOID
+import datetime
+import sqlite3
+import threading
+
+# Quantidade de linhas trazidas do banco por vez nas consultas por intervalo
+FETCH_SIZE = 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS certificates (
+    serial TEXT PRIMARY KEY,
+    subject_cn TEXT,
+    not_after INTEGER NOT NULL,
+    der BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_certificates_subject_cn ON certificates (subject_cn);
+CREATE INDEX IF NOT EXISTS idx_certificates_not_after ON certificates (not_after);
+CREATE TABLE IF NOT EXISTS revocations (
+    serial TEXT PRIMARY KEY,
+    revoked_at INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def serial_key(serial):
+    """
+    Converte o numero de serie (ate 160 bits) em texto hexadecimal de tamanho fixo,
+    cuja ordem lexica coincide com a ordem numerica.
+    """
+    return format(serial, "040x")
+
+
+def _common_name(cert):
+    attributes = cert.subject.get_attributes_for_oid(NameOID.COMMON_NAME)
+    return attributes[0].value if attributes else None
+
+
+def certificate_record(cert):
+    """
+    Extrai de um certificado os campos gravados pelo armazenamento, para que possam ser
+    calculados onde o certificado ja esta interpretado (ex.: no processo que o assinou).
+
+    Returns:
+        tuple: (numero de serie, nome comum, fim da validade em segundos, DER).
+    """
+    return (cert.serial_number,
+            _common_name(cert),
+            int(cert.not_valid_after_utc.timestamp()),
+            cert.public_bytes(serialization.Encoding.DER))
+
+
+class StoredCertificate:
+    """
+    Certificado lido do armazenamento. Os metadados indexados estao disponiveis de imediato,
+    enquanto o DER so e interpretado no primeiro acesso a `certificate`.
+    """
+    __slots__ = ("serial_number", "common_name", "not_valid_after_utc", "der", "_certificate")
+
+    def __init__(self, serial, common_name, not_after, der):
+        self.serial_number = int(serial, 16)
+        self.common_name = common_name
+        self.not_valid_after_utc = datetime.datetime.fromtimestamp(not_after, datetime.timezone.utc)
+        self.der = der
+        self._certificate = None
+
+    @property
+    def certificate(self):
+        """
+        Returns:
+            Certificate: O certificado X.509, interpretado sob demanda.
+        """
+        if self._certificate is None:
+            self._certificate = x509.load_der_x509_certificate(self.der)
+        return self._certificate
+
+
+class CertificateStore:
+    """
+    Armazenamento de certificados em SQLite, indexado por numero de serie, nome comum (CN)
+    e fim da validade. As buscas usam os indices (O(log n)) e nenhum certificado e
+    interpretado ao abrir o arquivo.
+
+    Args:
+        path (str): Caminho do banco de dados. Padrao: ":memory:" (nao persistente).
+    """
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__lock = threading.Lock()
+        with self.__lock, self.__connection:
+            self.__connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Fecha a conexao com o banco de dados.
+        """
+        with self.__lock:
+            self.__connection.close()
+
+    def __len__(self):
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM certificates").fetchone()[0]
+
+    def __contains__(self, serial):
+        with self.__lock:
+            return self.__connection.execute("SELECT 1 FROM certificates WHERE serial = ?",
+                                             (serial_key(serial),)).fetchone() is not None
+
+    def add(self, cert):
+        """
+        Armazena um certificado (substituindo outro com o mesmo numero de serie).
+
+        Args:
+            cert (Certificate): O certificado a ser armazenado.
+        """
+        self.add_many([cert])
+
+    def add_many(self, certs):
+        """
+        Armazena varios certificados em uma unica transacao.
+
+        Args:
+            certs (iterable): Os certificados (Certificate) a serem armazenados.
+        """
+        self.add_records(certificate_record(cert) for cert in certs)
+
+    def add_records(self, records):
+        """
+        Armazena em uma unica transacao certificados ja em DER, sem interpreta-los novamente.
+
+        Args:
+            records (iterable): Tuplas no formato de `certificate_record`.
+        """
+        rows = [(serial_key(serial), common_name, not_after, der)
+                for serial, common_name, not_after, der in records]
+        with self.__lock, self.__connection:
+            self.__connection.executemany("INSERT OR REPLACE INTO certificates VALUES (?, ?, ?, ?)", rows)
+
+    def get(self, serial):
+        """
+        Busca um certificado pelo numero de serie.
+
+        Returns:
+            StoredCertificate or None: O certificado, ou None se nao estiver armazenado.
+        """
+        with self.__lock:
+            row = self.__connection.execute("SELECT * FROM certificates WHERE serial = ?",
+                                            (serial_key(serial),)).fetchone()
+        return StoredCertificate(*row) if row else None
+
+    def find_by_common_name(self, common_name):
+        """
+        Busca os certificados emitidos para um nome comum (CN).
+
+        Returns:
+            list[StoredCertificate]: Os certificados encontrados.
+        """
+        with self.__lock:
+            rows = self.__connection.execute("SELECT * FROM certificates WHERE subject_cn = ?",
+                                             (common_name,)).fetchall()
+        return [StoredCertificate(*row) for row in rows]
+
+    def expiring_before(self, moment):
+        """
+        Percorre, em ordem de expiracao, os certificados que expiram antes de um instante.
+
+        Args:
+            moment (datetime): O instante limite (com fuso horario).
+
+        Returns:
+            iterator: Os certificados (StoredCertificate), lidos do banco em blocos.
+        """
+        return self.__select("SELECT * FROM certificates WHERE not_after < ? ORDER BY not_after",
+                             (int(moment.timestamp()),))
+
+    def serials(self):
+        """
+        Percorre os numeros de serie armazenados, em ordem crescente, sem ler os certificados.
+        """
+        with self.__lock:
+            cursor = self.__connection.execute("SELECT serial FROM certificates ORDER BY serial")
+        while True:
+            with self.__lock:
+                rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                return
+            for (serial,) in rows:
+                yield int(serial, 16)
+
+    def revoke(self, serial, revoked_at):
+        """
+        Registra a revogacao de um numero de serie (a primeira data registrada prevalece).
+
+        Args:
+            serial (int): O numero de serie revogado.
+            revoked_at (datetime): O instante da revogacao (com fuso horario).
+        """
+        with self.__lock, self.__connection:
+            self.__connection.execute("INSERT OR IGNORE INTO revocations VALUES (?, ?)",
+                                      (serial_key(serial), int(revoked_at.timestamp())))
+
+    def revocation_date(self, serial):
+        """
+        Returns:
+            datetime or None: O instante da revogacao, ou None se o numero de serie nao foi revogado.
+        """
+        with self.__lock:
+            row = self.__connection.execute("SELECT revoked_at FROM revocations WHERE serial = ?",
+                                            (serial_key(serial),)).fetchone()
+        return datetime.datetime.fromtimestamp(row[0], datetime.timezone.utc) if row else None
+
+    def revocations(self, after=0):
+        """
+        Percorre as revogacoes registradas, em ordem crescente de numero de serie.
+
+        Args:
+            after (int): Considera apenas as revogacoes registradas depois da marca
+                obtida com `last_revocation_id`. Padrao: todas.
+
+        Returns:
+            iterator: Pares (numero de serie, instante da revogacao).
+        """
+        with self.__lock:
+            cursor = self.__connection.execute(
+                "SELECT serial, revoked_at FROM revocations WHERE rowid > ? ORDER BY serial", (after,))
+        while True:
+            with self.__lock:
+                rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                return
+            for serial, revoked_at in rows:
+                yield int(serial, 16), datetime.datetime.fromtimestamp(revoked_at, datetime.timezone.utc)
+
+    def last_revocation_id(self):
+        """
+        Returns:
+            int: Marca da revogacao registrada mais recentemente (0 se nao houver), crescente
+                na ordem de registro e independente da data de revogacao informada.
+        """
+        with self.__lock:
+            return self.__connection.execute("SELECT COALESCE(MAX(rowid), 0) FROM revocations").fetchone()[0]
+
+    def get_value(self, name, default=None):
+        """
+        Returns:
+            int: O valor inteiro persistido com o nome informado, ou default se nao houver.
+        """
+        with self.__lock:
+            row = self.__connection.execute("SELECT value FROM metadata WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def set_values(self, **values):
+        """
+        Persiste valores inteiros nomeados (ex.: o estado das LCRs) em uma unica transacao.
+        """
+        with self.__lock, self.__connection:
+            self.__connection.executemany("INSERT OR REPLACE INTO metadata VALUES (?, ?)", values.items())
+
+    def increment(self, name):
+        """
+        Incrementa atomicamente um valor inteiro persistido (inicialmente 0).
+
+        Returns:
+            int: O novo valor.
+        """
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "INSERT INTO metadata VALUES (?, 1) ON CONFLICT (name) DO UPDATE SET value = value + 1", (name,))
+            return self.__connection.execute("SELECT value FROM metadata WHERE name = ?", (name,)).fetchone()[0]
+
+    def __select(self, query, parameters):
+        with self.__lock:
+            cursor = self.__connection.execute(query, parameters)
+        while True:
+            with self.__lock:
+                rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                return
+            for row in rows:
+                yield StoredCertificate(*row)
@@ -0,0 +1,148 @@
+"""
+Modo em lote: lê um fluxo JSONL de operações e escreve um fluxo JSONL de resultados, na
+mesma ordem, em um único processo. Substitui uma execução de aes.py, miller_rabin.py ou
+vigenere_cipher.py por operação, pagando a inicialização do Python uma única vez.
+
+Cada linha de entrada é um objeto com "op" e os campos da operação; o campo opcional "id"
+é repetido no resultado. Erros de uma linha são escritos como {"error": str} e não
+interrompem o lote.
+
+    {"op": "vigenere", "action": "cipher" | "decipher", "text": str, "key": str}  -> {"text": str}
+    {"op": "primality", "n": int | str}                                          -> {"prime": bool}
+    {"op": "aes", "action": "E" | "D", "mode": str, "key_size": str, "text": str} -> {"text": str}
+    {"op": "sign", "algorithm": str, "key": caminho, "message": str}             -> {"signature": str}
+    {"op": "verify", "algorithm": str, "key": caminho, "message": str, "signature": str} -> {"valid": bool}
+
+Em sign/verify, "key" é o caminho de uma chave (PEM ou DER) do algoritmo: privada para
+sign, pública ou privada para verify. Cada arquivo é lido uma única vez por execução.
+
+Os módulos de cada operação (e suas dependências, como Cryptodome) só são importados na
+primeira linha que os usa.
+
+Uso: python cli.py [entrada.jsonl] [-o saida.jsonl]
+"""
+import argparse
+import json
+import sys
+from functools import lru_cache
+
+# Quantidade de arquivos de chave mantidos carregados
+KEY_CACHE_SIZE = 256
+
+
+def _vigenere(record: dict) -> dict:
+    from vigenere_cipher import VigenereCipher
+    if record['action'] == 'cipher':
+        return {'text': VigenereCipher.cipher(record['text'], record['key'])}
+    if record['action'] == 'decipher':
+        return {'text': VigenereCipher.decipher(record['text'], record['key'])}
+    raise ValueError(f"Ação desconhecida: {record['action']}")
+
+
+def _primality(record: dict) -> dict:
+    from miller_rabin import is_probable_prime
+    n = record['n']
+    # Rejeita floats (ex.: 1e999, que o JSON lê como inf) e booleanos em vez de truncá-los
+    if isinstance(n, bool) or not isinstance(n, (int, str)):
+        raise TypeError('n deve ser um inteiro ou uma string com um inteiro')
+    return {'prime': is_probable_prime(int(n))}
+
+
+def _aes(record: dict) -> dict:
+    from aes import AESWrapper
+    # Um wrapper novo por linha: o estado da cifra (CTR/CBC/OFB) não passa de uma linha para outra,
+    # de modo que cada resultado é igual ao de uma execução isolada de aes.py
+    aes_wrapper = AESWrapper(record['key_size'], record['mode'])
+    if record['action'] == 'E':
+        return {'text': aes_wrapper.encrypt(record['text'])}
+    if record['action'] == 'D':
+        return {'text': aes_wrapper.decrypt(record['text'])}
+    raise ValueError(f"Ação desconhecida: {record['action']}")
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def _signer(algorithm: str, path: str):
+    """
+    Carrega a chave do arquivo e cria o objeto de sign_lib correspondente.
+    """
+    import sign_lib
+    from key_pool import import_key
+    if algorithm not in ('RSA', 'DSA', 'ECDSA'):
+        raise ValueError(f'Algoritmo desconhecido: {algorithm}')
+    with open(path, 'rb') as key_file:
+        key = import_key(algorithm, key_file.read())
+    return getattr(sign_lib, algorithm)(key=key)
+
+
+def _sign(record: dict) -> dict:
+    signer = _signer(record['algorithm'], record['key'])
+    return {'signature': signer.sign_message(record['message'])}
+
+
+def _verify(record: dict) -> dict:
+    signer = _signer(record['algorithm'], record['key'])
+    return {'valid': signer.verify_signature(record['message'], record['signature'], signer.public_key)}
+
+
+OPERATIONS = {
+    'vigenere': _vigenere,
+    'primality': _primality,
+    'aes': _aes,
+    'sign': _sign,
+    'verify': _verify,
+}
+
+
+def process_record(record: dict) -> dict:
+    """
+    Executa a operação de um registro.
+
+    :param record: O registro com "op", os campos da operação e, opcionalmente, "id".
+    :return: O resultado, ou {"error": str} em caso de falha.
+    """
+    try:
+        result = OPERATIONS[record['op']](record)
+    except KeyError as error:
+        result = {'error': f'Campo ausente ou operação desconhecida: {error}'}
+    except (ValueError, TypeError, AttributeError, ArithmeticError, OSError) as error:
+        result = {'error': str(error) or type(error).__name__}
+    if 'id' in record:
+        result = {'id': record['id'], **result}
+    return result
+
+
+def run(source, destination) -> int:
+    """
+    Processa todas as linhas de source, escrevendo um resultado por linha em destination.
+
+    :param source: Iterável de linhas JSON (ex.: arquivo de texto aberto).
+    :param destination: Objeto com write que recebe as linhas de resultado.
+    :return: Quantidade de registros processados.
+    """
+    count = 0
+    for line in source:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            result = {'error': 'JSON inválido'}
+        else:
+            result = process_record(record) if isinstance(record, dict) else {'error': 'Registro inválido'}
+        destination.write(json.dumps(result, ensure_ascii=False))
+        destination.write('\n')
+        count += 1
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Processa um fluxo JSONL de operações criptográficas')
+    parser.add_argument('input', nargs='?', type=argparse.FileType('r', encoding='utf-8'), default=sys.stdin)
+    parser.add_argument('-o', '--output', type=argparse.FileType('w', encoding='utf-8'), default=sys.stdout)
+    args = parser.parse_args()
+    with args.input, args.output:
+        run(args.input, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,481 @@
+"""
+Serviço local de criptografia: assinatura, cifragem e validação de certificados atendidas
+por um servidor asyncio em um socket Unix, com o trabalho de CPU em um pool de processos.
+
+Protocolo: uma requisição JSON por linha, uma resposta JSON por linha. Dados binários
+trafegam em base64 e chaves públicas em PEM. As respostas podem chegar fora de ordem;
+o campo "id" da requisição é repetido na resposta.
+
+    {"id": 1, "op": "sign", "data": b64}                            -> {"signature": b64}
+    {"op": "verify", "data": b64, "signature": b64, "public_key"?}  -> {"valid": bool}
+    {"op": "rsa_encrypt", "data": b64, "public_key"?}               -> {"ciphertext": b64}
+    {"op": "rsa_decrypt", "ciphertext": b64}                        -> {"data": b64}
+    {"op": "aes_encrypt", "data": b64}                              -> {"ciphertext": b64}
+    {"op": "aes_decrypt", "ciphertext": b64}                        -> {"data": b64}
+    {"op": "validate", "certificate": pem}                          -> {"valid": bool, "reason": str}
+    {"op": "info"}                                                  -> chaves públicas e certificado da AC
+
+Sem "public_key", verify e rsa_encrypt usam as chaves do próprio serviço. Erros de uma
+requisição são respondidos como {"error": str} sem afetar as demais do lote.
+
+Uso: python -m crypto_service --socket /tmp/crypto.sock [--algorithm ECDSA] [--workers W]
+"""
+import argparse
+import asyncio
+import binascii
+import contextlib
+import json
+import os
+import signal
+from base64 import b64decode, b64encode
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from cryptography import x509
+from cryptography.hazmat.primitives import serialization
+
+import RSA
+import key_pool
+import sign_lib
+from AC import AC
+from aes import AESWrapper
+from cache import LRUCache
+
+# Quantidade máxima de requisições de uma mesma operação reunidas em um lote
+SERVICE_BATCH_SIZE = 64
+# Requisições aguardando lote, por operação; quando cheia, a leitura das conexões pausa
+QUEUE_SIZE = 1024
+# Requisições em andamento por conexão antes de parar de ler novas linhas
+MAX_PENDING_PER_CONNECTION = 256
+# Tamanho máximo de uma linha (requisição) recebida
+MAX_LINE_SIZE = 16 * 1024 * 1024
+# Chaves públicas de terceiros (verify/rsa_encrypt) mantidas importadas em cada processo
+PUBLIC_KEY_CACHE_SIZE = 1024
+# Lotes simultâneos nas threads (AES e validação), que liberam o GIL apenas em parte
+THREAD_SLOTS = 2
+
+# Operações executadas no pool de processos; as demais rodam em threads do processo principal
+PROCESS_OPERATIONS = ('sign', 'verify', 'rsa_encrypt', 'rsa_decrypt')
+THREAD_OPERATIONS = ('aes_encrypt', 'aes_decrypt', 'validate')
+
+
+def _error(error: Exception) -> dict:
+    return {'error': str(error) or type(error).__name__}
+
+
+class _Handlers:
+    """
+    Executa os lotes das operações de PROCESS_OPERATIONS com as chaves do serviço.
+    Uma instância é criada em cada processo do pool a partir das chaves em DER.
+    """
+    def __init__(self, algorithm: str, signer_der: bytes, rsa_der: bytes):
+        self.signer = getattr(sign_lib, algorithm)(key=key_pool.import_key(algorithm, signer_der))
+        self.rsa = RSA.RSA(key=key_pool.import_key('RSA', rsa_der))
+        self.public_keys = LRUCache(PUBLIC_KEY_CACHE_SIZE)
+
+    def __public_key(self, pem: str | None):
+        if pem is None:
+            return self.signer.public_key
+        return self.public_keys.get_or_create(pem, lambda: key_pool.import_key(self.signer.ALGORITHM, pem))
+
+    def sign(self, requests: list[dict]) -> list[dict]:
+        responses = [None] * len(requests)
+        indexes, messages = [], []
+        for index, request in enumerate(requests):
+            try:
+                messages.append(b64decode(request['data']))
+                indexes.append(index)
+            except (KeyError, TypeError, binascii.Error) as error:
+                responses[index] = _error(error)
+        for index, signature in zip(indexes, self.signer.sign_many(messages)):
+            responses[index] = {'signature': signature}
+        return responses
+
+    def verify(self, requests: list[dict]) -> list[dict]:
+        responses = [None] * len(requests)
+        groups = {}
+        for index, request in enumerate(requests):
+            try:
+                signature = request['signature']
+                if not isinstance(signature, str):
+                    raise TypeError('signature deve ser uma string em base64')
+                entry = (index, b64decode(request['data']), b64decode(signature, validate=True))
+                groups.setdefault(request.get('public_key'), []).append(entry)
+            except (KeyError, TypeError, binascii.Error) as error:
+                responses[index] = _error(error)
+        # Cada chave pública distinta é importada uma vez e verifica todo o seu grupo de uma vez;
+        # uma falha afeta apenas as requisições do grupo
+        for pem, entries in groups.items():
+            try:
+                results = self.signer.verify_many([data for _, data, _ in entries],
+                                                  [signature for _, _, signature in entries],
+                                                  self.__public_key(pem), encoded=False)
+            except (ValueError, IndexError, TypeError) as error:
+                results = [_error(error)] * len(entries)
+            else:
+                results = [{'valid': valid} for valid in results]
+            for (index, _, _), response in zip(entries, results):
+                responses[index] = response
+        return responses
+
+    def rsa_encrypt(self, requests: list[dict]) -> list[dict]:
+        responses = []
+        for request in requests:
+            try:
+                recipient = RSA.get_recipient(request.get('public_key') or self.rsa.public_key)
+                ciphertext = recipient.cipher.encrypt(b64decode(request['data']))
+                responses.append({'ciphertext': b64encode(ciphertext).decode()})
+            except (KeyError, TypeError, ValueError, IndexError) as error:
+                responses.append(_error(error))
+        return responses
+
+    def rsa_decrypt(self, requests: list[dict]) -> list[dict]:
+        responses = []
+        for request in requests:
+            try:
+                data = self.rsa.cipher.decrypt(b64decode(request['ciphertext']))
+                responses.append({'data': b64encode(data).decode()})
+            except (KeyError, TypeError, ValueError) as error:
+                responses.append(_error(error))
+        return responses
+
+
+# Handlers de cada processo do pool, criados uma única vez
+_worker_handlers = None
+
+
+def _init_service_worker(algorithm: str, signer_der: bytes, rsa_der: bytes):
+    global _worker_handlers
+    _worker_handlers = _Handlers(algorithm, signer_der, rsa_der)
+
+
+def _handle_batch_in_worker(operation: str, requests: list[dict]) -> list[dict]:
+    return getattr(_worker_handlers, operation)(requests)
+
+
+class CryptoService:
+    """
+    Servidor asyncio que atende as operações de sign_lib, RSA, AESWrapper e AC.
+
+    Cada operação tem uma fila limitada; uma tarefa por operação retira da fila todas as
+    requisições já disponíveis (até batch_size) e as envia juntas ao executor, de modo que,
+    sob carga, o custo de despacho é pago por lote e não por requisição. Assinaturas e RSA
+    vão para o pool de processos (um lote por processo por vez); AES e validação de
+    certificados rodam em threads, pois dependem do estado do processo principal (contextos
+    em cache, índice de revogação da AC). Com as filas cheias, as conexões deixam de ser
+    lidas até haver espaço, propagando a contrapressão aos clientes.
+
+    :param signer: Instância de sign_lib.RSA, DSA ou ECDSA usada em sign/verify.
+    :param rsa_cipher: Instância de RSA.RSA usada em rsa_encrypt/rsa_decrypt.
+    :param aes_wrapper: AESWrapper usado em aes_encrypt/aes_decrypt.
+    :param ac: AC (já com certificado) usada em validate.
+    :param workers: Quantidade de processos (None: número de CPUs).
+    :param batch_size: Quantidade máxima de requisições por lote.
+    :param queue_size: Capacidade da fila de cada operação.
+    """
+    def __init__(self, signer, rsa_cipher: RSA.RSA, aes_wrapper: AESWrapper, ac: AC, workers: int = None,
+                 batch_size: int = SERVICE_BATCH_SIZE, queue_size: int = QUEUE_SIZE):
+        self.signer = signer
+        self.rsa = rsa_cipher
+        self.aes = aes_wrapper
+        self.ac = ac
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.requests = dict.fromkeys(PROCESS_OPERATIONS + THREAD_OPERATIONS, 0)
+        self.batches = dict.fromkeys(PROCESS_OPERATIONS + THREAD_OPERATIONS, 0)
+        self.__processes = None
+        self.__threads = None
+        self.__server = None
+        self.__tasks = []
+        self.__queues = {}
+        self.__connections = {}
+
+    async def __aenter__(self) -> 'CryptoService':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def start(self, path: str) -> None:
+        """
+        Inicia o pool de processos, as tarefas de lote e o servidor no socket Unix informado.
+
+        :param path: Caminho do socket (substituído se já existir).
+        """
+        self.__processes = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_service_worker,
+            initargs=(self.signer.ALGORITHM, self.signer.private_key.export_key(format='DER'),
+                      self.rsa.private_key.export_key(format='DER')))
+        self.__threads = ThreadPoolExecutor(max_workers=THREAD_SLOTS, thread_name_prefix='crypto-service')
+        process_slots = asyncio.Semaphore(self.workers)
+        thread_slots = asyncio.Semaphore(THREAD_SLOTS)
+        for operation in PROCESS_OPERATIONS + THREAD_OPERATIONS:
+            self.__queues[operation] = queue = asyncio.Queue(self.queue_size)
+            slots = process_slots if operation in PROCESS_OPERATIONS else thread_slots
+            self.__tasks.append(asyncio.create_task(self.__batch_loop(operation, queue, slots)))
+
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+        self.__server = await asyncio.start_unix_server(self.__handle_connection, path, limit=MAX_LINE_SIZE)
+
+    async def serve_forever(self) -> None:
+        """
+        Atende conexões até a tarefa ser cancelada.
+        """
+        await self.__server.serve_forever()
+
+    async def close(self) -> None:
+        """
+        Para de aceitar conexões e encerra as tarefas de lote e os executores.
+        """
+        if self.__server is not None:
+            self.__server.close()
+            # Encerrar os transportes faz as conexões abertas lerem EOF e terminarem normalmente
+            for writer in self.__connections.values():
+                writer.close()
+            await asyncio.gather(*self.__connections, return_exceptions=True)
+            await self.__server.wait_closed()
+            self.__server = None
+        for task in self.__tasks:
+            task.cancel()
+        await asyncio.gather(*self.__tasks, return_exceptions=True)
+        self.__tasks.clear()
+        for executor in (self.__processes, self.__threads):
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        self.__processes = self.__threads = None
+
+    def info(self) -> dict:
+        """
+        Chaves públicas do serviço e certificado da AC, em PEM.
+        """
+        signer_public_key = self.signer.public_key.export_key(format='PEM')
+        return {
+            'algorithm': self.signer.ALGORITHM,
+            'signer_public_key': signer_public_key if isinstance(signer_public_key, str) else signer_public_key.decode(),
+            'rsa_public_key': self.rsa.export_public_key().decode(),
+            'ca_certificate': self.ac.ca_certificate.public_bytes(serialization.Encoding.PEM).decode(),
+        }
+
+    def __handle_thread_batch(self, operation: str, requests: list[dict]) -> list[dict]:
+        if operation == 'validate':
+            return self.__validate(requests)
+        responses = []
+        for request in requests:
+            try:
+                if operation == 'aes_encrypt':
+                    ciphertext = self.aes.context.encrypt(b64decode(request['data']))
+                    responses.append({'ciphertext': b64encode(ciphertext).decode()})
+                else:
+                    data = self.aes.context.decrypt(b64decode(request['ciphertext']))
+                    responses.append({'data': b64encode(data).decode()})
+            except (KeyError, TypeError, ValueError) as error:
+                responses.append(_error(error))
+        return responses
+
+    def __validate(self, requests: list[dict]) -> list[dict]:
+        responses = [None] * len(requests)
+        indexes, certificates = [], []
+        for index, request in enumerate(requests):
+            try:
+                certificates.append(x509.load_pem_x509_certificate(request['certificate'].encode()))
+                indexes.append(index)
+            except (KeyError, AttributeError, ValueError) as error:
+                responses[index] = _error(error)
+        for index, result in zip(indexes, self.ac.validateCertificates(certificates, workers=1)):
+            responses[index] = {'valid': result.valid, 'reason': result.reason}
+        return responses
+
+    async def __batch_loop(self, operation: str, queue: asyncio.Queue, slots: asyncio.Semaphore) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            # Enquanto espera um executor livre, mais requisições se acumulam para o mesmo lote
+            await slots.acquire()
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            requests = [request for request, _ in batch]
+            if operation in PROCESS_OPERATIONS:
+                pending = loop.run_in_executor(self.__processes, _handle_batch_in_worker, operation, requests)
+            else:
+                pending = loop.run_in_executor(self.__threads, self.__handle_thread_batch, operation, requests)
+            self.requests[operation] += len(batch)
+            self.batches[operation] += 1
+            pending.add_done_callback(lambda done, batch=batch: self.__resolve(done, batch, slots))
+
+    @staticmethod
+    def __resolve(done: asyncio.Future, batch: list, slots: asyncio.Semaphore) -> None:
+        slots.release()
+        if done.cancelled():
+            responses = [{'error': 'Serviço encerrado'}] * len(batch)
+        elif done.exception() is not None:
+            responses = [_error(done.exception())] * len(batch)
+        else:
+            responses = done.result()
+        for (_, future), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
+
+    async def __dispatch(self, line: bytes) -> dict:
+        try:
+            request = json.loads(line)
+            operation = request['op']
+        except (ValueError, KeyError, TypeError):
+            return {'error': 'Requisição inválida'}
+        if operation == 'info':
+            response = self.info()
+        elif operation in self.__queues:
+            future = asyncio.get_running_loop().create_future()
+            await self.__queues[operation].put((request, future))
+            response = await future
+        else:
+            response = {'error': f'Operação desconhecida: {operation}'}
+        if 'id' in request:
+            response = {'id': request['id'], **response}
+        return response
+
+    async def __answer(self, line: bytes, writer: asyncio.StreamWriter, lock: asyncio.Lock,
+                       window: asyncio.Semaphore) -> None:
+        try:
+            response = await self.__dispatch(line)
+            async with lock:
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            window.release()
+
+    async def __handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        lock = asyncio.Lock()
+        window = asyncio.Semaphore(MAX_PENDING_PER_CONNECTION)
+        pending = set()
+        connection = asyncio.current_task()
+        self.__connections[connection] = writer
+        try:
+            while line := await reader.readline():
+                await window.acquire()
+                task = asyncio.create_task(self.__answer(line, writer, lock, window))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            await asyncio.gather(*pending)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            del self.__connections[connection]
+            for task in pending:
+                task.cancel()
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+
+class CryptoClient:
+    """
+    Cliente assíncrono do serviço: várias requisições podem estar em andamento na mesma conexão.
+
+    :param path: Caminho do socket Unix do serviço.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.__reader = None
+        self.__writer = None
+        self.__receiver = None
+        self.__next_id = 0
+        self.__pending: dict[int, asyncio.Future] = {}
+
+    async def __aenter__(self) -> 'CryptoClient':
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def connect(self) -> None:
+        """
+        Abre a conexão com o serviço.
+        """
+        self.__reader, self.__writer = await asyncio.open_unix_connection(self.path, limit=MAX_LINE_SIZE)
+        self.__receiver = asyncio.create_task(self.__receive())
+
+    async def close(self) -> None:
+        """
+        Fecha a conexão; requisições ainda pendentes falham com ConnectionError.
+        """
+        if self.__writer is not None:
+            self.__writer.close()
+            with contextlib.suppress(ConnectionError):
+                await self.__writer.wait_closed()
+            await asyncio.gather(self.__receiver, return_exceptions=True)
+            self.__writer = None
+
+    async def request(self, op: str, **fields) -> dict:
+        """
+        Envia uma requisição e aguarda sua resposta.
+
+        :param op: Nome da operação.
+        :param fields: Demais campos da requisição (dados binários já em base64).
+        :return: A resposta, sem o campo "id".
+        """
+        self.__next_id += 1
+        request_id = self.__next_id
+        future = asyncio.get_running_loop().create_future()
+        self.__pending[request_id] = future
+        self.__writer.write(json.dumps({'id': request_id, 'op': op, **fields}).encode() + b'\n')
+        await self.__writer.drain()
+        response = await future
+        del response['id']
+        return response
+
+    async def __receive(self) -> None:
+        try:
+            while line := await self.__reader.readline():
+                response = json.loads(line)
+                future = self.__pending.pop(response['id'], None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self.__pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('Conexão com o serviço encerrada'))
+            self.__pending.clear()
+
+
+SIGNERS = {
+    'RSA': lambda: sign_lib.RSA(2048),
+    'DSA': lambda: sign_lib.DSA(2048),
+    'ECDSA': lambda: sign_lib.ECDSA('P-256'),
+}
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    ac = AC()
+    ac.issueSelfsignedCertificate()
+    service = CryptoService(SIGNERS[args.algorithm](), RSA.RSA(2048), AESWrapper(args.aes_key_size, 'GCM'), ac,
+                            workers=args.workers, batch_size=args.batch_size, queue_size=args.queue_size)
+    # SIGTERM/SIGINT cancelam o atendimento, encerrando o pool de processos de forma ordenada
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signal_number, asyncio.current_task().cancel)
+    async with service:
+        await service.start(args.socket)
+        print(f'Atendendo em {args.socket}', flush=True)
+        await service.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Serviço local de criptografia em um socket Unix')
+    parser.add_argument('--socket', default='/tmp/crypto_service.sock')
+    parser.add_argument('--algorithm', choices=sorted(SIGNERS), default='ECDSA')
+    parser.add_argument('--aes-key-size', choices=('128', '192', '256'), default='256')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=SERVICE_BATCH_SIZE)
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE)
+    args = parser.parse_args()
+    with contextlib.suppress(asyncio.CancelledError):
+        asyncio.run(_serve(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,430 @@
+"""
+Instrumentação opcional dos caminhos críticos: contagens, volume de dados e histogramas de
+latência por operação, exportados como dicionário ou no formato texto do Prometheus, e
+janelas de profiling (cProfile ou amostragem) cobrindo as próximas N operações.
+
+Desativada, a instrumentação não custa nada: enable substitui os métodos-alvo por versões
+medidas e disable devolve os originais, sem verificações no caminho normal. As medidas são
+do processo atual; pools de processos (ex.: crypto_service) têm contadores próprios.
+
+    import instrumentation
+    instrumentation.enable()
+    ...
+    instrumentation.INSTRUMENTATION.write_prometheus('/var/lib/node_exporter/crypto.prom')
+"""
+import bisect
+import cProfile
+import functools
+import http.server
+import importlib
+import io
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+# Limites superiores (em segundos) dos intervalos dos histogramas de latência
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Intervalo entre amostras do profiling por amostragem
+SAMPLING_INTERVAL = 0.001
+METRIC_PREFIX = 'crypto'
+
+# Métodos instrumentados: (módulo, classe, método, origem do volume de dados), onde o volume
+# vem do primeiro argumento ('args'), do valor de retorno em bytes ('result') ou não é medido (None)
+DEFAULT_TARGETS = (
+    ('aes', 'AESWrapper', 'encrypt', 'args'),
+    ('aes', 'AESWrapper', 'decrypt', 'args'),
+    ('aes', 'AESWrapper', 'encrypt_many', 'args'),
+    ('aes', 'AESWrapper', 'decrypt_many', 'args'),
+    ('aes', 'AESWrapper', 'encrypt_stream', 'result'),
+    ('aes', 'AESWrapper', 'decrypt_stream', 'result'),
+    ('RSA', 'RSA', 'encrypt_message', 'args'),
+    ('RSA', 'RSA', 'decrypt_message', 'args'),
+    ('RSA', 'RSA', 'encrypt_envelope', 'args'),
+    ('RSA', 'RSA', 'decrypt_envelope', 'args'),
+    ('sign_lib', 'RSA', 'sign_message', 'args'),
+    ('sign_lib', 'RSA', 'verify_signature', 'args'),
+    ('sign_lib', 'DSA', 'sign_message', 'args'),
+    ('sign_lib', 'DSA', 'verify_signature', 'args'),
+    ('sign_lib', 'ECDSA', 'sign_message', 'args'),
+    ('sign_lib', 'ECDSA', 'verify_signature', 'args'),
+    ('sign_lib', '_Signer', 'sign_many', 'args'),
+    ('sign_lib', '_Signer', 'verify_many', 'args'),
+    ('AC', 'AC', 'issueEndCertificate', None),
+    ('AC', 'AC', 'validateCertificate', None),
+    ('AC', 'AC', 'validateCertificates', None),
+)
+
+
+def _size(value) -> int:
+    """
+    Tamanho em bytes (ou caracteres, para str) de um dado ou da soma de uma lista de dados.
+    """
+    if isinstance(value, (bytes, bytearray, memoryview, str)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(len(item) for item in value if isinstance(item, (bytes, bytearray, memoryview, str)))
+    return 0
+
+
+class _OperationStats:
+    """
+    Contadores e histograma de latência de uma operação.
+    """
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.bytes = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.count = self.errors = self.bytes = 0
+            self.latency_sum = 0.0
+            self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, elapsed: float, size: int, failed: bool) -> None:
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, elapsed)
+        with self.lock:
+            self.count += 1
+            self.errors += failed
+            self.bytes += size
+            self.latency_sum += elapsed
+            self.buckets[bucket] += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            cumulative, total = {}, 0
+            for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), self.buckets):
+                total += count
+                cumulative[bound] = total
+            return {
+                'count': self.count,
+                'errors': self.errors,
+                'bytes': self.bytes,
+                'latency_sum': self.latency_sum,
+                'latency_buckets': cumulative,
+            }
+
+
+class ProfileWindow:
+    """
+    Profiling das próximas `operations` operações instrumentadas.
+
+    No modo 'cprofile', cada operação (apenas as chamadas mais externas, uma thread por vez)
+    roda sob um cProfile.Profile. No modo 'sampling', uma thread registra a pilha das threads
+    que estão dentro de operações a cada `interval` segundos, com custo independente da
+    quantidade de chamadas Python; o resultado é um Counter de pilhas no formato "folded"
+    (funções separadas por ';'), aceito por ferramentas de flame graph.
+
+    :param operations: Quantidade de operações cobertas.
+    :param mode: 'cprofile' ou 'sampling'.
+    :param path: Arquivo onde o resultado é gravado ao final (pstats ou pilhas "folded").
+    :param interval: Intervalo entre amostras (modo 'sampling').
+    """
+    def __init__(self, operations: int, mode: str = 'cprofile', path: str = None,
+                 interval: float = SAMPLING_INTERVAL):
+        if mode not in ('cprofile', 'sampling'):
+            raise ValueError(f'Modo de profiling desconhecido: {mode}')
+        self.operations = operations
+        self.mode = mode
+        self.path = path
+        self.interval = interval
+        self.remaining = operations
+        self.result = None
+        self.__finished = 0
+        self.__profiler = cProfile.Profile() if mode == 'cprofile' else None
+        self.__busy = threading.Lock()
+        self.__lock = threading.Lock()
+        self.__done = threading.Event()
+        self.__active_threads: set[int] = set()
+        self.__samples = Counter()
+        self.__sampler = None
+        if mode == 'sampling':
+            self.__sampler = threading.Thread(target=self.__sample, name='instrumentation-sampler', daemon=True)
+            self.__sampler.start()
+
+    @property
+    def done(self) -> bool:
+        return self.__done.is_set()
+
+    def wait(self, timeout: float = None):
+        """
+        Aguarda o fim da janela.
+
+        :return: pstats.Stats (cprofile) ou Counter de pilhas (sampling); None se o tempo esgotar.
+        """
+        return self.result if self.__done.wait(timeout) else None
+
+    def run(self, function, args, kwargs):
+        """
+        Executa uma operação dentro da janela, se ainda houver operações a cobrir.
+        """
+        with self.__lock:
+            covered = self.remaining > 0
+            self.remaining -= covered
+        if not covered:
+            return function(*args, **kwargs)
+        try:
+            if self.mode == 'sampling':
+                return self.__run_sampled(function, args, kwargs)
+            if not self.__busy.acquire(blocking=False):
+                # cProfile.Profile não pode ser usado por duas threads ao mesmo tempo
+                return function(*args, **kwargs)
+            try:
+                return self.__profiler.runcall(function, *args, **kwargs)
+            finally:
+                self.__busy.release()
+        finally:
+            with self.__lock:
+                self.__finished += 1
+                finished = self.__finished == self.operations
+            if finished:
+                self.__finish()
+
+    def __run_sampled(self, function, args, kwargs):
+        thread_id = threading.get_ident()
+        with self.__lock:
+            self.__active_threads.add(thread_id)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            with self.__lock:
+                self.__active_threads.discard(thread_id)
+
+    def __sample(self) -> None:
+        while not self.__done.is_set():
+            with self.__lock:
+                active = set(self.__active_threads)
+            if active:
+                frames = sys._current_frames()
+                for thread_id in active:
+                    frame = frames.get(thread_id)
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                        frame = frame.f_back
+                    if stack:
+                        self.__samples[';'.join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    def __finish(self) -> None:
+        if self.mode == 'cprofile':
+            self.result = pstats.Stats(self.__profiler)
+            if self.path:
+                self.result.dump_stats(self.path)
+        else:
+            self.__done.set()
+            self.__sampler.join()
+            self.result = self.__samples
+            if self.path:
+                with open(self.path, 'w', encoding='utf-8') as output:
+                    output.writelines(f'{stack} {count}\n' for stack, count in self.__samples.most_common())
+        self.__done.set()
+
+    def report(self, limit: int = 20) -> str:
+        """
+        Resumo legível do resultado: funções por tempo acumulado ou pilhas mais amostradas.
+        """
+        if self.result is None:
+            return ''
+        if self.mode == 'sampling':
+            return ''.join(f'{count:>8} {stack}\n' for stack, count in self.result.most_common(limit))
+        output = io.StringIO()
+        pstats.Stats(self.__profiler, stream=output).sort_stats('cumulative').print_stats(limit)
+        return output.getvalue()
+
+
+class Instrumentation:
+    """
+    Instala e remove os métodos medidos e guarda as estatísticas de cada operação.
+
+    As operações são nomeadas "módulo.Classe.método" e os contadores são preservados entre
+    disable/enable (use reset para zerá-los).
+    """
+    def __init__(self):
+        self.__stats: dict[str, _OperationStats] = {}
+        self.__originals: list[tuple[type, str, object]] = []
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        self.__window = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.__originals)
+
+    def enable(self, targets=DEFAULT_TARGETS) -> None:
+        """
+        Substitui os métodos-alvo por versões instrumentadas (importando seus módulos).
+
+        :param targets: Tuplas (módulo, classe, método, origem do volume), como DEFAULT_TARGETS.
+        """
+        with self.__lock:
+            if self.__originals:
+                return
+            for module_name, class_name, method_name, size_source in targets:
+                cls = getattr(importlib.import_module(module_name), class_name)
+                original = cls.__dict__[method_name]
+                name = f'{module_name}.{class_name}.{method_name}'
+                stats = self.__stats.setdefault(name, _OperationStats())
+                setattr(cls, method_name, self.__instrument(original, stats, size_source))
+                self.__originals.append((cls, method_name, original))
+
+    def disable(self) -> None:
+        """
+        Restaura os métodos originais.
+        """
+        with self.__lock:
+            while self.__originals:
+                cls, method_name, original = self.__originals.pop()
+                setattr(cls, method_name, original)
+
+    def reset(self) -> None:
+        """
+        Zera as estatísticas de todas as operações.
+        """
+        with self.__lock:
+            for stats in self.__stats.values():
+                stats.clear()
+
+    def __instrument(self, function, stats: _OperationStats, size_source: str | None):
+        local = self.__local
+        instrumentation = self
+
+        @functools.wraps(function)
+        def instrumented(*args, **kwargs):
+            window = instrumentation.__window
+            depth = getattr(local, 'depth', 0)
+            local.depth = depth + 1
+            failed = True
+            start = time.perf_counter()
+            try:
+                if window is not None and depth == 0 and not window.done:
+                    result = window.run(function, args, kwargs)
+                else:
+                    result = function(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                elapsed = time.perf_counter() - start
+                local.depth = depth
+                if size_source == 'args':
+                    size = _size(args[1]) if len(args) > 1 else 0
+                elif size_source == 'result' and not failed and isinstance(result, int):
+                    size = result
+                else:
+                    size = 0
+                stats.record(elapsed, size, failed)
+
+        return instrumented
+
+    def profile(self, operations: int, mode: str = 'cprofile', path: str = None,
+                interval: float = SAMPLING_INTERVAL) -> ProfileWindow:
+        """
+        Abre uma janela de profiling para as próximas `operations` operações instrumentadas,
+        substituindo a janela anterior. Veja ProfileWindow.
+        """
+        self.__window = ProfileWindow(operations, mode, path, interval)
+        return self.__window
+
+    def snapshot(self) -> dict[str, dict]:
+        """
+        Estatísticas de cada operação já chamada: contagem, erros, volume de dados, soma das
+        latências (s) e histograma cumulativo {limite superior (s): contagem}.
+        """
+        with self.__lock:
+            stats = dict(self.__stats)
+        return {name: operation.snapshot() for name, operation in stats.items() if operation.count}
+
+    def prometheus_text(self) -> str:
+        """
+        As estatísticas no formato de exposição em texto do Prometheus.
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name: str, kind: str, description: str, samples) -> None:
+            lines.append(f'# HELP {METRIC_PREFIX}_{name} {description}')
+            lines.append(f'# TYPE {METRIC_PREFIX}_{name} {kind}')
+            lines.extend(f'{METRIC_PREFIX}_{sample_name}{{{labels}}} {value}' for sample_name, labels, value in samples)
+
+        def label(operation: str) -> str:
+            return f'operation="{operation}"'
+
+        metric('operations_total', 'counter', 'Operações executadas.',
+               [('operations_total', label(name), data['count']) for name, data in snapshot.items()])
+        metric('operation_errors_total', 'counter', 'Operações que terminaram com exceção.',
+               [('operation_errors_total', label(name), data['errors']) for name, data in snapshot.items()])
+        metric('operation_bytes_total', 'counter', 'Volume de dados processado.',
+               [('operation_bytes_total', label(name), data['bytes']) for name, data in snapshot.items()])
+        samples = []
+        for name, data in snapshot.items():
+            for bound, count in data['latency_buckets'].items():
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                samples.append(('operation_latency_seconds_bucket', f'{label(name)},le="{le}"', count))
+            samples.append(('operation_latency_seconds_sum', label(name), repr(data['latency_sum'])))
+            samples.append(('operation_latency_seconds_count', label(name), data['count']))
+        metric('operation_latency_seconds', 'histogram', 'Latência das operações.', samples)
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Grava prometheus_text em um arquivo, substituindo-o atomicamente (compatível com o
+        coletor "textfile" do node_exporter, que nunca lê um arquivo pela metade).
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.instrumentation-')
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as output:
+                output.write(self.prometheus_text())
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def serve_prometheus(self, port: int = 9464, host: str = '127.0.0.1') -> http.server.ThreadingHTTPServer:
+        """
+        Expõe prometheus_text em http://host:port/metrics por uma thread em segundo plano.
+
+        :return: O servidor (encerre com shutdown()).
+        """
+        instrumentation = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = instrumentation.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name='instrumentation-http', daemon=True).start()
+        return server
+
+
+INSTRUMENTATION = Instrumentation()
+
+
+def enable(targets=DEFAULT_TARGETS) -> None:
+    """Ativa a instrumentação global (veja Instrumentation.enable)"""
+    INSTRUMENTATION.enable(targets)
+
+
+def disable() -> None:
+    """Desativa a instrumentação global, restaurando os métodos originais"""
+    INSTRUMENTATION.disable()
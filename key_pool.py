@@ -0,0 +1,240 @@
+"""
+Pool de pares de chaves RSA, DSA e ECDSA pré-gerados em processos de segundo plano.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import suppress
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+
+from Cryptodome.PublicKey import DSA as CryptoDSA
+from Cryptodome.PublicKey import ECC
+from Cryptodome.PublicKey import RSA as CryptoRSA
+
+from sign_lib import DSA_DOMAINS, DSADomainCache
+
+# Quantidade de chaves mantidas prontas por (algoritmo, tamanho)
+DEFAULT_WATERMARK = 4
+
+
+def generate_key(algorithm: str, size):
+    """
+    Gera um par de chaves.
+
+    :param algorithm: 'RSA', 'DSA' ou 'ECDSA'.
+    :param size: Tamanho em bits (RSA/DSA) ou nome da curva (ECDSA).
+    :return: A chave privada (que também dá acesso à pública).
+    """
+    if algorithm == 'RSA':
+        return CryptoRSA.generate(size)
+    if algorithm == 'DSA':
+        return DSA_DOMAINS.generate_key(size)
+    if algorithm == 'ECDSA':
+        return ECC.generate(curve=size)
+    raise ValueError(f'Algoritmo desconhecido: {algorithm}')
+
+
+def import_key(algorithm: str, der: bytes):
+    """
+    Importa uma chave privada exportada em DER por _generate_key_der.
+    """
+    if algorithm == 'RSA':
+        return CryptoRSA.import_key(der)
+    if algorithm == 'DSA':
+        return CryptoDSA.import_key(der)
+    return ECC.import_key(der)
+
+
+def _generate_key_der(algorithm: str, size, dsa_domain: tuple[int, int, int] = None) -> bytes:
+    if dsa_domain is not None:
+        # Usa os parâmetros do processo principal, e não um conjunto próprio deste processo
+        DSA_DOMAINS.put(size, dsa_domain)
+    return generate_key(algorithm, size).export_key(format='DER')
+
+
+class _PoolStats:
+    """
+    Contadores de um (algoritmo, tamanho) do pool.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+        self.refill_seconds = 0.0
+        self.max_refill_seconds = 0.0
+
+
+class KeyPool:
+    """
+    Mantém, para cada (algoritmo, tamanho) usado, até `watermark` chaves já geradas.
+
+    acquire entrega uma chave pronta na hora (acerto) ou, com o pool vazio, gera uma no
+    processo atual (falha); em ambos os casos dispara a reposição assíncrona em um pool de
+    processos. As chaves trafegam entre processos em DER.
+
+    Os parâmetros de domínio DSA que ainda não estão em DSA_DOMAINS também são gerados no
+    pool de processos; a reposição de chaves DSA daquele tamanho começa quando ficam prontos.
+
+    :param watermark: Quantidade de chaves mantidas prontas por (algoritmo, tamanho).
+    :param workers: Quantidade de processos geradores (None: número de CPUs).
+    """
+    def __init__(self, watermark: int = DEFAULT_WATERMARK, workers: int = None):
+        self.watermark = watermark
+        self.__executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        self.__lock = threading.Lock()
+        self.__keys: dict[tuple, deque] = {}
+        self.__pending: dict[tuple, int] = {}
+        self.__stats: dict[tuple, _PoolStats] = {}
+        self.__domain_futures: dict[int, Future] = {}
+        self.__closed = False
+
+    def __enter__(self) -> 'KeyPool':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Encerra os processos geradores, descartando as reposições pendentes.
+        """
+        with self.__lock:
+            self.__closed = True
+        self.__executor.shutdown(cancel_futures=True)
+
+    def prefill(self, algorithm: str, size) -> None:
+        """
+        Inicia a geração de chaves até a marca d'água, sem esperar por elas.
+        """
+        if algorithm == 'DSA':
+            dsa_domain = self.__dsa_domain(size)
+            if dsa_domain is None:
+                return
+        else:
+            dsa_domain = None
+        with self.__lock:
+            scheduled = self.__refill((algorithm, size), dsa_domain)
+        self.__watch((algorithm, size), scheduled)
+
+    def acquire(self, algorithm: str, size):
+        """
+        Retira uma chave do pool.
+
+        :param algorithm: 'RSA', 'DSA' ou 'ECDSA'.
+        :param size: Tamanho em bits (RSA/DSA) ou nome da curva (ECDSA).
+        :return: A chave privada.
+        """
+        slot = (algorithm, size)
+        dsa_domain = self.__dsa_domain(size) if algorithm == 'DSA' else None
+        with self.__lock:
+            keys = self.__keys.get(slot)
+            key = keys.popleft() if keys else None
+            stats = self.__stats.setdefault(slot, _PoolStats())
+            if key is None:
+                stats.misses += 1
+            else:
+                stats.hits += 1
+            pending_domain = algorithm == 'DSA' and dsa_domain is None
+            scheduled = [] if pending_domain else self.__refill(slot, dsa_domain)
+            domain_future = self.__domain_futures.get(size) if pending_domain else None
+        self.__watch(slot, scheduled)
+        if key is not None:
+            return key
+        if domain_future is not None:
+            # Falha com os parâmetros ainda em geração: espera por eles em vez de gerar outros
+            with suppress(CancelledError):
+                DSA_DOMAINS.put(size, domain_future.result())
+        return generate_key(algorithm, size)
+
+    def available(self, algorithm: str, size) -> int:
+        """
+        Quantidade de chaves prontas para (algoritmo, tamanho).
+        """
+        with self.__lock:
+            return len(self.__keys.get((algorithm, size), ()))
+
+    def stats(self) -> dict[str, dict]:
+        """
+        Retorna os contadores de acertos, falhas e reposições de cada (algoritmo, tamanho).
+        """
+        with self.__lock:
+            return {
+                f'{algorithm}-{size}': {
+                    'available': len(self.__keys.get((algorithm, size), ())),
+                    'pending': self.__pending.get((algorithm, size), 0),
+                    'hits': stats.hits,
+                    'misses': stats.misses,
+                    'refills': stats.refills,
+                    'mean_refill_seconds': stats.refill_seconds / stats.refills if stats.refills else 0.0,
+                    'max_refill_seconds': stats.max_refill_seconds,
+                }
+                for (algorithm, size), stats in self.__stats.items()
+            }
+
+    def __refill(self, slot: tuple, dsa_domain: tuple[int, int, int] = None) -> list[tuple]:
+        """
+        Agenda gerações até que chaves prontas + pendentes atinjam a marca d'água.
+        Deve ser chamado com a trava adquirida. Chaves DSA são geradas nos processos com os
+        parâmetros de domínio (p, q, g) deste processo, enviados junto com cada tarefa.
+
+        :return: Os pares (future, início) agendados, a serem passados a __watch depois de
+            liberar a trava.
+        """
+        if self.__closed:
+            return []
+        self.__stats.setdefault(slot, _PoolStats())
+        missing = self.watermark - len(self.__keys.get(slot, ())) - self.__pending.get(slot, 0)
+        scheduled = []
+        for _ in range(missing):
+            started = time.perf_counter()
+            scheduled.append((self.__executor.submit(_generate_key_der, *slot, dsa_domain), started))
+            self.__pending[slot] = self.__pending.get(slot, 0) + 1
+        return scheduled
+
+    def __watch(self, slot: tuple, scheduled: list[tuple]) -> None:
+        """
+        Registra __on_generated nas gerações agendadas. Deve ser chamado sem a trava: um
+        future já concluído executa o callback na hora, e __on_generated adquire a trava.
+        """
+        for future, started in scheduled:
+            future.add_done_callback(lambda done, started=started: self.__on_generated(slot, started, done))
+
+    def __dsa_domain(self, size: int) -> tuple[int, int, int] | None:
+        """
+        Retorna os parâmetros de domínio DSA em cache ou, se ainda não existirem, agenda uma
+        única geração no pool de processos e retorna None, sem esperar por ela.
+        """
+        dsa_domain = DSA_DOMAINS.peek(size)
+        if dsa_domain is not None:
+            return dsa_domain
+        with self.__lock:
+            if self.__closed or size in self.__domain_futures:
+                return None
+            future = self.__domain_futures[size] = self.__executor.submit(DSADomainCache.generate, size)
+        future.add_done_callback(lambda done: self.__on_domain_generated(size, done))
+        return None
+
+    def __on_domain_generated(self, size: int, future) -> None:
+        dsa_domain = None
+        if not future.cancelled() and future.exception() is None:
+            dsa_domain = DSA_DOMAINS.put(size, future.result(), save=True)
+        with self.__lock:
+            del self.__domain_futures[size]
+            scheduled = self.__refill(('DSA', size), dsa_domain) if dsa_domain is not None else []
+        self.__watch(('DSA', size), scheduled)
+
+    def __on_generated(self, slot: tuple, started: float, future) -> None:
+        elapsed = time.perf_counter() - started
+        key = None
+        if not future.cancelled() and future.exception() is None:
+            key = import_key(slot[0], future.result())
+        with self.__lock:
+            self.__pending[slot] -= 1
+            if key is None:
+                return
+            self.__keys.setdefault(slot, deque()).append(key)
+            stats = self.__stats[slot]
+            stats.refills += 1
+            stats.refill_seconds += elapsed
+            stats.max_refill_seconds = max(stats.max_refill_seconds, elapsed)
@@ -0,0 +1,126 @@
+"""
+Árvore de Merkle (SHA-256) sobre blocos de tamanho fixo de um documento.
+
+Segue a construção da RFC 6962: folhas e nós internos recebem prefixos distintos
+(0x00 e 0x01), e um nó sem par em um nível sobe inalterado para o nível seguinte.
+"""
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Iterable
+
+# Tamanho padrão de cada bloco (folha) do documento
+LEAF_SIZE = 1024 * 1024
+
+_LEAF_PREFIX = b'\x00'
+_NODE_PREFIX = b'\x01'
+
+
+def leaf_hash(chunk: bytes) -> bytes:
+    """
+    Calcula o hash de uma folha.
+
+    :param chunk: O conteúdo do bloco.
+    :return: O hash SHA-256 da folha.
+    """
+    digest = hashlib.sha256(_LEAF_PREFIX)
+    digest.update(chunk)
+    return digest.digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    """
+    Calcula o hash de um nó interno a partir dos hashes dos filhos.
+    """
+    return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+
+def leaf_hashes(data: memoryview, leaf_size: int = LEAF_SIZE, workers: int = None) -> list[bytes]:
+    """
+    Calcula os hashes das folhas de um buffer (ex.: um mmap) em paralelo.
+
+    O hashlib libera o GIL ao processar blocos grandes, então as threads usam vários
+    núcleos sem copiar o buffer.
+
+    :param data: O conteúdo do documento.
+    :param leaf_size: O tamanho de cada folha.
+    :param workers: Quantidade de threads (None: padrão do ThreadPoolExecutor).
+    :return: Os hashes das folhas, na ordem do documento.
+    """
+    view = memoryview(data)
+    chunks = [view[start:start + leaf_size] for start in range(0, len(view), leaf_size)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(leaf_hash, chunks))
+
+
+def stream_leaf_hashes(stream: BinaryIO, leaf_size: int = LEAF_SIZE) -> list[bytes]:
+    """
+    Calcula os hashes das folhas lendo um fluxo sequencialmente, um bloco por vez.
+    """
+    buffer = bytearray(leaf_size)
+    view = memoryview(buffer)
+    hashes = []
+    while True:
+        size = 0
+        while size < leaf_size:
+            read = stream.readinto(view[size:])
+            if not read:
+                break
+            size += read
+        if size:
+            hashes.append(leaf_hash(view[:size]))
+        if size < leaf_size:
+            return hashes
+
+
+def root(leaves: Iterable[bytes]) -> bytes:
+    """
+    Calcula a raiz da árvore a partir dos hashes das folhas.
+
+    :return: O hash raiz (SHA-256 vazio se não houver folhas).
+    """
+    level = list(leaves)
+    if not level:
+        return hashlib.sha256().digest()
+    while len(level) > 1:
+        next_level = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            next_level.append(level[-1])
+        level = next_level
+    return level[0]
+
+
+def proof(leaves: list[bytes], index: int) -> list[tuple[bytes, bool]]:
+    """
+    Gera a prova de inclusão de uma folha.
+
+    :param leaves: Os hashes de todas as folhas.
+    :param index: A posição da folha.
+    :return: Pares (hash do irmão, irmão à esquerda), da folha até a raiz.
+    """
+    path = []
+    level = list(leaves)
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append((level[sibling], sibling < index))
+        next_level = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            next_level.append(level[-1])
+        level = next_level
+        index //= 2
+    return path
+
+
+def verify_proof(chunk: bytes, path: list[tuple[bytes, bool]], expected_root: bytes) -> bool:
+    """
+    Verifica se um bloco pertence ao documento cuja raiz é expected_root.
+
+    :param chunk: O conteúdo do bloco.
+    :param path: A prova de inclusão gerada por proof.
+    :param expected_root: A raiz da árvore do documento.
+    :return: True se o bloco e a prova reconstroem a raiz, False caso contrário.
+    """
+    current = leaf_hash(chunk)
+    for sibling, sibling_on_left in path:
+        current = node_hash(sibling, current) if sibling_on_left else node_hash(current, sibling)
+    return current == expected_root
@@ -1,5 +1,190 @@
 """Arquivo para implementação de teste de primalidade pelo algoritmo de Miller-Rabin"""
 
+import math
+import os
+import secrets
+from typing import Iterable, Iterator, Optional
+
+# Números abaixo deste limite são classificados diretamente pelo crivo
+SIEVE_LIMIT = 1 << 16
+# Primos usados na divisão por tentativa (via mdc com o produto deles)
+TRIAL_DIVISION_LIMIT = 1 << 10
+
+# Bases que tornam o teste determinístico para n < 2^64
+BASES_64_BITS = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+# Os 13 primeiros primos tornam o teste determinístico para n < 3.317 * 10^24
+PRIME_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+PRIME_BASES_LIMIT = 3317044064679887385961981
+# Rodadas com bases aleatórias para números acima dos limites determinísticos
+RANDOM_ROUNDS = 16
+# Quantidade de candidatos ímpares em cada janela do crivo incremental
+SIEVE_WINDOW = 4096
+# Menor tamanho (em bits) aceito pelo gerador de primos
+MIN_PRIME_BITS = 16
+
+
+def _sieve(limit: int) -> bytearray:
+    """Crivo de Eratóstenes: table[i] == 1 se, e somente se, i é primo"""
+    table = bytearray([1]) * limit
+    table[0:2] = b'\x00\x00'
+    for i in range(2, math.isqrt(limit - 1) + 1):
+        if table[i]:
+            table[i * i::i] = bytes(len(range(i * i, limit, i)))
+    return table
+
+
+SIEVE = _sieve(SIEVE_LIMIT)
+SMALL_PRIMES = [i for i in range(TRIAL_DIVISION_LIMIT) if SIEVE[i]]
+SMALL_PRIMES_PRODUCT = math.prod(SMALL_PRIMES)
+
+
+def _strong_probable_prime(n: int, a: int, m: int, k: int) -> bool:
+    """Teste de Miller-Rabin para uma base a, com n-1 = 2^k * m"""
+    x = pow(a, m, n)
+    if x in (1, n - 1):
+        return True
+    for _ in range(k - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+    return False
+
+
+def is_probable_prime(n: int) -> bool:
+    """Classifica n com crivo, divisão por tentativa e Miller-Rabin
+
+    O resultado é exato para n < 3.317 * 10^24; acima disso usa RANDOM_ROUNDS
+    bases aleatórias além das bases primas fixas.
+    """
+    if n < SIEVE_LIMIT:
+        return n >= 0 and SIEVE[n] == 1
+    if math.gcd(n, SMALL_PRIMES_PRODUCT) != 1:
+        return False
+
+    n_minus_1 = n - 1
+    k = (n_minus_1 & -n_minus_1).bit_length() - 1
+    m = n_minus_1 >> k
+
+    if n < 1 << 64:
+        bases = BASES_64_BITS
+    elif n < PRIME_BASES_LIMIT:
+        bases = PRIME_BASES
+    else:
+        bases = PRIME_BASES + tuple(2 + secrets.randbelow(n - 3) for _ in range(RANDOM_ROUNDS))
+
+    for a in bases:
+        a %= n
+        if a and not _strong_probable_prime(n, a, m, k):
+            return False
+    return True
+
+
+def _sieve_window(start: int, size: int) -> bytearray:
+    """Marca, na janela de candidatos ímpares start + 2i (0 <= i < size), os que
+    não têm fatores primos pequenos. Cada primo pequeno é processado uma única vez,
+    riscando seus múltiplos por fatiamento.
+
+    Returns:
+        survivors[i] == 1 se start + 2i sobreviveu ao crivo
+    """
+    survivors = bytearray([1]) * size
+    for p in SMALL_PRIMES[1:]:
+        # Primeiro i com start + 2i ≡ 0 (mod p); (p + 1) // 2 é o inverso de 2 mod p
+        first = (-start * ((p + 1) // 2)) % p
+        survivors[first::p] = bytes(len(range(first, size, p)))
+    return survivors
+
+
+def search_window(bits: int, window: int = SIEVE_WINDOW) -> Optional[int]:
+    """Sorteia uma janela de candidatos com `bits` bits e retorna o primeiro primo provável
+
+    Apenas os sobreviventes do crivo passam pelo Miller-Rabin. Cada janela fornece
+    no máximo um primo, evitando primos próximos entre si.
+
+    Returns:
+        o primo encontrado, ou None se a janela não contiver nenhum
+    """
+    top = 1 << (bits - 1)
+    window = min(window, top // 4)
+    start = (top + secrets.randbelow(top - 2 * window)) | 1
+    survivors = _sieve_window(start, window)
+    index = survivors.find(1)
+    while index != -1:
+        candidate = start + 2 * index
+        if is_probable_prime(candidate):
+            return candidate
+        index = survivors.find(1, index + 1)
+    return None
+
+
+class PrimeGenerator:
+    """Gera primos prováveis aleatórios distribuindo janelas do crivo entre processos
+
+    Args:
+        workers: quantidade de processos (1 executa tudo no processo atual)
+        window: quantidade de candidatos ímpares por janela
+    """
+    def __init__(self, workers: Optional[int] = None, window: int = SIEVE_WINDOW):
+        self.workers = workers or os.cpu_count() or 1
+        self.window = window
+        self.windows_searched = 0
+        self.__executor = None
+
+    def __enter__(self) -> 'PrimeGenerator':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Encerra o pool de processos, se tiver sido criado"""
+        if self.__executor is not None:
+            self.__executor.shutdown(cancel_futures=True)
+            self.__executor = None
+
+    def generate(self, bits: int, count: int = 1) -> 'list[int]':
+        """Gera `count` primos prováveis distintos com exatamente `bits` bits
+
+        Mantém até 2 janelas por processo em andamento e cancela as restantes assim
+        que a quantidade pedida é atingida.
+        """
+        if bits < MIN_PRIME_BITS:
+            raise ValueError(f'bits deve ser ao menos {MIN_PRIME_BITS}')
+
+        primes: 'set[int]' = set()
+        if self.workers == 1:
+            while len(primes) < count:
+                self.windows_searched += 1
+                prime = search_window(bits, self.window)
+                if prime is not None:
+                    primes.add(prime)
+            return list(primes)
+
+        # Importado aqui: só a geração paralela precisa de multiprocessing
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(max_workers=self.workers)
+        pending = {self.__executor.submit(search_window, bits, self.window) for _ in range(2 * self.workers)}
+        try:
+            while len(primes) < count:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.windows_searched += 1
+                    prime = future.result()
+                    if prime is not None and len(primes) < count:
+                        primes.add(prime)
+                    pending.add(self.__executor.submit(search_window, bits, self.window))
+        finally:
+            for future in pending:
+                future.cancel()
+        return list(primes)
+
+
+def generate_primes(bits: int, count: int = 1, workers: Optional[int] = None) -> 'list[int]':
+    """Atalho para gerar primos prováveis com um PrimeGenerator temporário"""
+    with PrimeGenerator(workers) as generator:
+        return generator.generate(bits, count)
+
 
 class MillerRabin:
     """Dado n ímpar, n-1 = 2^k*m
@@ -21,30 +206,10 @@ class MillerRabin:
         """
         m, k = n, 0
         while (m) % 2 == 0:
-            m /= 2
+            m //= 2
             k += 1
         return (k, m)
 
-    def __modular_power(self, base: int, exponent: int, module: int) -> 'int':
-        """Calcula exponenciação utilizando regras de aritmética modular
-        Isso deixa o cálculo mais eficiente
-        (base^exponent) % module => (base % module)^exponent
-
-        Args:
-            base: base da exponenciação
-            exponent: expoente inteiro
-            module: módulo em que será feito o cálculo
-        """
-
-        base %= module
-        result = 1
-        while exponent > 0:
-            if exponent % 2 == 1:
-                result = (result * base) % module
-            base = (base * base) % module
-            exponent //= 2
-        return result
-
     def __test_is_prime(self, n: int, a: int, m: int, k: int) -> 'bool':
         """Aplica o teste de Miller-Rabin para um valor de a
 
@@ -59,14 +224,14 @@ class MillerRabin:
             return False 
 
         # a^m mod n = 1 ?
-        x = self.__modular_power(a, m, n)
+        x = pow(a, m, n)
 
         if x in (1, n-1):  # We already test here the case i = 0 of the loop below
             return True
 
         # [a^(2^i*m)] mod n = n-1 p/ algum 0 < i < k?
         for _ in range(k - 1):
-            x = self.__modular_power(x, 2, n)
+            x = x * x % n
             if x == n-1:
                 return True
 
@@ -98,24 +263,40 @@ class MillerRabin:
         return_list = []
 
         for a in self.range_for_testing_a:
-            prime = self.__test_is_prime(n, a, int(m), k)
+            prime = self.__test_is_prime(n, a, m, k)
             return_list.append((a, prime))
             if not prime:
                 break
 
         return return_list
 
+    def test_many(self, candidates: Iterable[int]) -> Iterator['tuple[int, bool]']:
+        """Testa a primalidade de muitos candidatos, devolvendo os resultados sob demanda
+
+        Candidatos pequenos são resolvidos pelo crivo pré-calculado, os demais passam
+        por divisão por tentativa e só então pelo Miller-Rabin, com bases determinísticas
+        para entradas de até 64 bits.
+
+        Args:
+            candidates: qualquer iterável de inteiros (lista, array, gerador...)
+        Return:
+            iterador de tuplas (candidato, provavelmente primo), na ordem de entrada
+        """
+        for n in candidates:
+            yield n, is_probable_prime(n)
+
 
-INPUT = int(input())
+if __name__ == '__main__':
+    INPUT = int(input())
 
-miller = MillerRabin()
+    miller = MillerRabin()
 
-tests_results = miller.test_for_many_a(INPUT)
+    tests_results = miller.test_for_many_a(INPUT)
 
-# Formatando a saída
-is_prime = True
-for a, prime in tests_results:
-    print(f"Teste a={a} -> {'Provavelmente primo' if prime else 'Composto'}")
-    if not prime:
-        is_prime = False
-print(f"Resultado final: {INPUT} é {'provavelmente primo' if is_prime else 'composto'}")
\ No newline at end of file
+    # Formatando a saída
+    is_prime = True
+    for a, prime in tests_results:
+        print(f"Teste a={a} -> {'Provavelmente primo' if prime else 'Composto'}")
+        if not prime:
+            is_prime = False
+    print(f"Resultado final: {INPUT} é {'provavelmente primo' if is_prime else 'composto'}")
@@ -0,0 +1,156 @@
+"""
+Indice compacto de numeros de serie revogados.
+"""
+from bisect import bisect_right
+
+_MASK_64 = (1 << 64) - 1
+_GOLDEN_RATIO_64 = 0x9E3779B97F4A7C15
+
+# Capacidade inicial do filtro de Bloom
+INITIAL_CAPACITY = 1024
+# Bits por elemento e quantidade de hashes do filtro: com o filtro pouco preenchido
+# (~17%), a maioria das consultas negativas termina no primeiro bit testado, e a
+# taxa de falsos positivos fica em torno de 0,5%
+BITS_PER_ELEMENT = 16
+HASH_COUNT = 3
+# Tamanho, em bytes, de cada numero de serie no indice (RFC 5280 limita a 20 octetos)
+SERIAL_SIZE = 20
+# Chaves do buffer entre duas entradas consecutivas da lista de busca binaria
+FENCE_INTERVAL = 32
+# Inclusoes acumuladas antes de intercalar: ao menos MERGE_SIZE, ou 1/MERGE_FRACTION do indice
+MERGE_SIZE = 256
+MERGE_FRACTION = 8
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom para inteiros. Os k indices sao derivados do proprio numero por
+    hashing duplo (h1 + i * h2), sem funcoes de hash externas, ja que os numeros de
+    serie emitidos pela AC sao aleatorios.
+
+    Args:
+        capacity (int): Quantidade de elementos prevista.
+        bits_per_element (int): Tamanho do filtro, em bits, por elemento previsto.
+        hash_count (int): Quantidade de indices testados por elemento.
+    """
+    def __init__(self, capacity, bits_per_element=BITS_PER_ELEMENT, hash_count=HASH_COUNT):
+        self.capacity = capacity
+        self.size = capacity * bits_per_element
+        self.hash_count = hash_count
+        self.__bits = bytearray((self.size + 7) // 8)
+
+    def add(self, value):
+        bits, size = self.__bits, self.size
+        position = value & _MASK_64
+        step = (((value >> 64) ^ (position * _GOLDEN_RATIO_64)) & _MASK_64) | 1
+        for _ in range(self.hash_count):
+            index = position % size
+            bits[index >> 3] |= 1 << (index & 7)
+            position += step
+
+    def __contains__(self, value):
+        # Primeiro indice testado fora do laco: e o unico na maioria das consultas negativas
+        bits, size = self.__bits, self.size
+        position = value & _MASK_64
+        index = position % size
+        if not bits[index >> 3] & (1 << (index & 7)):
+            return False
+        step = (((value >> 64) ^ (position * _GOLDEN_RATIO_64)) & _MASK_64) | 1
+        for _ in range(self.hash_count - 1):
+            position += step
+            index = position % size
+            if not bits[index >> 3] & (1 << (index & 7)):
+                return False
+        return True
+
+
+class RevocationIndex:
+    """
+    Conjunto de numeros de serie revogados: o filtro de Bloom descarta rapidamente os
+    numeros nao revogados (o caso comum) e os positivos sao confirmados em um unico buffer
+    ordenado de chaves de SERIAL_SIZE bytes (big-endian, cuja ordem lexica coincide com a
+    numerica), sem um objeto Python por numero de serie. Uma lista com uma chave a cada
+    FENCE_INTERVAL localiza, por busca binaria, o trecho do buffer onde a chave e procurada.
+
+    As inclusoes ficam em um conjunto de pendentes, intercalado ao buffer quando passa de
+    uma fracao do tamanho deste, o que mantem `add` em custo amortizado O(log n). O filtro
+    e reconstruido com o dobro da capacidade quando a quantidade de elementos a ultrapassa.
+
+    Args:
+        serials (iterable): Numeros de serie ja revogados.
+    """
+    def __init__(self, serials=()):
+        self.__pending = set()
+        self.__store(sorted({_serial_bytes(serial) for serial in serials}))
+        self.__rebuild_filter(max(INITIAL_CAPACITY, 2 * len(self)))
+
+    def __store(self, keys):
+        self.__buffer = b"".join(keys)
+        self.__fences = keys[::FENCE_INTERVAL]
+
+    def __keys(self):
+        buffer = self.__buffer
+        for start in range(0, len(buffer), SERIAL_SIZE):
+            yield buffer[start:start + SERIAL_SIZE]
+
+    def __rebuild_filter(self, capacity):
+        self.__filter = BloomFilter(capacity)
+        for serial in self:
+            self.__filter.add(serial)
+
+    def __merge(self):
+        if self.__pending:
+            # Duas sequencias ja ordenadas: o timsort as intercala em tempo linear
+            pending = sorted(_serial_bytes(serial) for serial in self.__pending)
+            self.__store(sorted([*self.__keys(), *pending]))
+            self.__pending.clear()
+
+    def __len__(self):
+        return len(self.__buffer) // SERIAL_SIZE + len(self.__pending)
+
+    def __iter__(self):
+        self.__merge()
+        for key in self.__keys():
+            yield int.from_bytes(key, "big")
+
+    def __contains__(self, serial):
+        if serial not in self.__filter:
+            return False
+        if serial in self.__pending:
+            return True
+        try:
+            key = _serial_bytes(serial)
+        except ValueError:
+            return False
+        fence = bisect_right(self.__fences, key) - 1
+        if fence < 0:
+            return False
+        start = fence * FENCE_INTERVAL * SERIAL_SIZE
+        end = start + FENCE_INTERVAL * SERIAL_SIZE
+        position = self.__buffer.find(key, start, end)
+        # Uma ocorrencia desalinhada atravessa duas chaves e nao conta
+        while position >= 0 and (position - start) % SERIAL_SIZE:
+            position = self.__buffer.find(key, position + 1, end)
+        return position >= 0
+
+    def add(self, serial):
+        """
+        Inclui um numero de serie revogado.
+        """
+        if serial in self:
+            return
+        _serial_bytes(serial)
+        self.__pending.add(serial)
+        if len(self.__pending) > max(MERGE_SIZE, len(self.__buffer) // SERIAL_SIZE // MERGE_FRACTION):
+            self.__merge()
+        if len(self) > self.__filter.capacity:
+            self.__rebuild_filter(2 * self.__filter.capacity)
+        else:
+            self.__filter.add(serial)
+
+
+def _serial_bytes(serial):
+    try:
+        return serial.to_bytes(SERIAL_SIZE, "big")
+    except OverflowError:
+        raise ValueError(f"Numero de serie fora do intervalo de {SERIAL_SIZE} bytes: {serial}") from None
@@ -4,19 +4,384 @@ from Cryptodome.PublicKey import ECC
 from Cryptodome.Signature import pkcs1_15, DSS
 from Cryptodome.Hash import SHA256
 from base64 import b64encode, b64decode
+from contextlib import contextmanager, suppress
+from itertools import repeat
+from typing import BinaryIO, Iterable
+import json
+import mmap
+import os
+import secrets
+import tempfile
+import threading
 
+import merkle
 
-class RSA:
-    def __init__(self, key_size: int = 2048, public_exponent: int = 65537):
+# Quantidade de mensagens enviada a cada tarefa do pool de processos
+SIGN_BATCH_SIZE = 256
+# Tamanho dos trechos entregues ao hash incremental ao assinar documentos
+HASH_CHUNK_SIZE = 1024 * 1024
+
+Document = str | os.PathLike | BinaryIO
+
+# Arquivo onde DSA_DOMAINS persiste os parâmetros de domínio DSA (ausente ou vazio: apenas em memória)
+DSA_DOMAINS_PATH = os.environ.get('DSA_DOMAINS_PATH') or None
+
+_KEY_IMPORTERS = {
+    'RSA': CryptoRSA.import_key,
+    'DSA': CryptoDSA.import_key,
+    'ECDSA': ECC.import_key,
+}
+
+
+def _new_scheme(algorithm: str, key):
+    """
+    Cria o objeto de assinatura/verificação do algoritmo para a chave informada.
+    """
+    if algorithm == 'RSA':
+        return pkcs1_15.new(key)
+    return DSS.new(key, 'fips-186-3')
+
+
+def _sign_batch(scheme, messages: list[bytes], encode: bool) -> list[str | bytes]:
+    signatures = [scheme.sign(SHA256.new(message)) for message in messages]
+    return [b64encode(signature).decode() for signature in signatures] if encode else signatures
+
+
+def _verify_batch(scheme, pairs: list[tuple], encoded: bool) -> list[bool]:
+    results = []
+    for message, signature in pairs:
+        try:
+            scheme.verify(SHA256.new(message), b64decode(signature) if encoded else signature)
+            results.append(True)
+        except ValueError:
+            results.append(False)
+    return results
+
+
+# Objeto de assinatura/verificação de cada processo do pool, criado uma única vez
+_worker_scheme = None
+
+
+def _init_scheme_worker(algorithm: str, key_der: bytes):
+    global _worker_scheme
+    _worker_scheme = _new_scheme(algorithm, _KEY_IMPORTERS[algorithm](key_der))
+
+
+def _sign_batch_in_worker(messages: list[bytes], encode: bool) -> list[str | bytes]:
+    return _sign_batch(_worker_scheme, messages, encode)
+
+
+def _verify_batch_in_worker(pairs: list[tuple], encoded: bool) -> list[bool]:
+    return _verify_batch(_worker_scheme, pairs, encoded)
+
+
+def _batches(items: list, size: int) -> list[list]:
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+@contextmanager
+def _mapped(document: Document):
+    """
+    Mapeia em memória (mmap, somente leitura) o documento dado por caminho.
+    Para fluxos já abertos, retorna None, e o documento deve ser lido sequencialmente.
+    """
+    if not isinstance(document, (str, os.PathLike)):
+        yield None
+        return
+    with open(document, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def _document_hash(document: Document):
+    """
+    Calcula o SHA-256 do documento de forma incremental, sem carregá-lo inteiro em memória.
+    """
+    digest = SHA256.new()
+    with _mapped(document) as mapped:
+        if mapped is not None:
+            for start in range(0, len(mapped), HASH_CHUNK_SIZE):
+                with memoryview(mapped)[start:start + HASH_CHUNK_SIZE] as chunk:
+                    digest.update(chunk)
+            return digest
+    buffer = bytearray(HASH_CHUNK_SIZE)
+    with memoryview(buffer) as view:
+        while read := document.readinto(view):
+            digest.update(view[:read])
+    return digest
+
+
+def _document_merkle_leaves(document: Document, leaf_size: int, workers: int) -> list[bytes]:
+    with _mapped(document) as mapped:
+        if mapped is not None:
+            return merkle.leaf_hashes(mapped, leaf_size, workers)
+    return merkle.stream_leaf_hashes(document, leaf_size)
+
+
+class DSADomainCache:
+    """
+    Cache dos parâmetros de domínio (p, q, g) do DSA por tamanho de chave.
+
+    Gerar (p, q, g) é a parte cara da geração de chaves DSA; com os parâmetros em cache,
+    uma nova chave custa apenas sortear x e calcular y = g^x mod p. Os parâmetros podem
+    ser compartilhados entre chaves (FIPS 186-4) e, se houver um caminho, são persistidos
+    em JSON, carregados no primeiro uso e validados uma única vez.
+
+    :param path: Arquivo JSON onde os parâmetros são persistidos (None: apenas em memória).
+    """
+    def __init__(self, path: str | os.PathLike = None):
+        self.path = path
+        self.__domains: dict[int, tuple[int, int, int]] = {}
+        self.__loaded = False
+        self.__lock = threading.Lock()
+        self.__generating: dict[int, threading.Lock] = {}
+
+    def __load(self) -> None:
+        """
+        Lê os parâmetros persistidos, na primeira chamada. Deve ser chamado com a trava adquirida.
+        """
+        if self.__loaded:
+            return
+        self.__loaded = True
+        if self.path is not None and os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as file:
+                for key_size, (p, q, g) in json.load(file).items():
+                    self.__domains.setdefault(int(key_size), self.__validated(int(p, 16), int(q, 16), int(g, 16)))
+
+    @staticmethod
+    def __validated(p: int, q: int, g: int) -> tuple[int, int, int]:
+        # construct verifica a primalidade de p e q e a consistência de g
+        x = 1 + secrets.randbelow(q - 1)
+        CryptoDSA.construct((pow(g, x, p), g, p, q, x))
+        return p, q, g
+
+    @staticmethod
+    def generate(key_size: int) -> tuple[int, int, int]:
+        """
+        Gera novos parâmetros (p, q, g), sem consultar nem alterar cache algum.
+        """
+        key = CryptoDSA.generate(key_size)
+        return key.p, key.q, key.g
+
+    def peek(self, key_size: int) -> tuple[int, int, int] | None:
+        """
+        Retorna os parâmetros em cache para o tamanho de chave, ou None, sem gerá-los.
+        """
+        with self.__lock:
+            self.__load()
+            return self.__domains.get(key_size)
+
+    def get(self, key_size: int) -> tuple[int, int, int]:
+        """
+        Retorna os parâmetros (p, q, g) para o tamanho de chave, gerando-os na primeira vez.
+        A geração ocorre fora da trava do cache e uma única vez por tamanho: chamadas
+        concorrentes para o mesmo tamanho esperam por ela, as demais não.
+        """
+        domain = self.peek(key_size)
+        if domain is not None:
+            return domain
+        with self.__lock:
+            once = self.__generating.setdefault(key_size, threading.Lock())
+        with once:
+            domain = self.peek(key_size)
+            if domain is None:
+                domain = self.put(key_size, self.generate(key_size), save=True)
+        return domain
+
+    def put(self, key_size: int, domain: tuple[int, int, int], save: bool = False) -> tuple[int, int, int]:
+        """
+        Registra parâmetros já validados (ex.: recebidos do processo principal ou gerados em
+        outro processo). Parâmetros já em cache para o tamanho prevalecem.
+
+        :param save: Se True, persiste o cache no arquivo (quando houver um).
+        :return: Os parâmetros em cache para o tamanho após o registro.
+        """
+        with self.__lock:
+            self.__load()
+            if key_size not in self.__domains:
+                self.__domains[key_size] = tuple(domain)
+                if save:
+                    self.__save()
+            return self.__domains[key_size]
+
+    def generate_key(self, key_size: int) -> CryptoDSA.DsaKey:
+        """
+        Gera uma chave DSA a partir dos parâmetros de domínio em cache.
+        """
+        p, q, g = self.get(key_size)
+        x = 1 + secrets.randbelow(q - 1)
+        return CryptoDSA.construct((pow(g, x, p), g, p, q, x), consistency_check=False)
+
+    def __save(self) -> None:
+        if self.path is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.dsa_domains-')
+        except OSError:
+            # Persistir é apenas uma otimização: sem permissão de escrita, o cache fica em memória
+            return
+        replaced = False
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+                json.dump({str(key_size): [format(value, 'x') for value in domain]
+                           for key_size, domain in self.__domains.items()}, file)
+            os.replace(temporary, self.path)
+            replaced = True
+        except OSError:
+            pass
+        finally:
+            if not replaced:
+                with suppress(OSError):
+                    os.unlink(temporary)
+
+
+# Cache padrão usado por DSA.generate_keys, persistido em DSA_DOMAINS_PATH se definido
+DSA_DOMAINS = DSADomainCache(DSA_DOMAINS_PATH)
+
+
+class _Signer:
+    """
+    Operações compartilhadas por RSA, DSA e ECDSA: assinatura em lote e de documentos.
+    As subclasses definem ALGORITHM e os atributos private_key/public_key.
+    """
+    ALGORITHM: str
+
+    def __run(self, key, worker_function, batch_function, items: list, workers: int, flag: bool) -> list:
+        """
+        Executa batch_function no processo atual ou distribui os lotes entre processos,
+        cada um com seu próprio objeto de assinatura criado a partir da chave em DER.
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(items) <= SIGN_BATCH_SIZE:
+            return batch_function(_new_scheme(self.ALGORITHM, key), items, flag)
+
+        # Importado aqui: multiprocessing só é necessário no caminho paralelo
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_scheme_worker,
+                                 initargs=(self.ALGORITHM, key.export_key(format='DER'))) as executor:
+            results = executor.map(worker_function, _batches(items, SIGN_BATCH_SIZE), repeat(flag))
+            return [result for batch in results for result in batch]
+
+    def sign_many(self, messages: Iterable[bytes], encode: bool = True, workers: int = 1) -> list[str | bytes]:
+        """
+        Assina um lote de mensagens reutilizando o mesmo objeto de assinatura.
+
+        :param messages: As mensagens em bytes a serem assinadas.
+        :param encode: Se True, retorna as assinaturas em base64 (str); caso contrário, em bytes.
+        :param workers: Quantidade de processos (None: número de CPUs; 1: processo atual).
+        :return: As assinaturas, na ordem das mensagens.
+        """
+        return self.__run(self.private_key, _sign_batch_in_worker, _sign_batch,
+                          list(messages), workers, encode)
+
+    def verify_many(self, messages: Iterable[bytes], signatures: Iterable[str | bytes],
+                    public_key, encoded: bool = True, workers: int = 1) -> list[bool]:
+        """
+        Verifica um lote de assinaturas reutilizando o mesmo objeto de verificação.
+
+        :param messages: As mensagens originais em bytes.
+        :param signatures: As assinaturas, na ordem das mensagens (ValueError se as quantidades diferirem).
+        :param public_key: A chave pública do remetente.
+        :param encoded: Se True, as assinaturas estão em base64; caso contrário, em bytes.
+        :param workers: Quantidade de processos (None: número de CPUs; 1: processo atual).
+        :return: Para cada mensagem, True se a assinatura for válida, False caso contrário.
+        """
+        return self.__run(public_key, _verify_batch_in_worker, _verify_batch,
+                          list(zip(messages, signatures, strict=True)), workers, encoded)
+
+    def sign_document(self, document: Document) -> str:
+        """
+        Assina um documento (caminho ou fluxo binário) calculando o hash de forma incremental.
+        A assinatura equivale à de sign_message sobre o mesmo conteúdo.
+
+        :param document: O caminho do arquivo (lido via mmap) ou um fluxo binário aberto.
+        :return: Assinatura destacada do documento, codificada em base64.
+        """
+        signed = _new_scheme(self.ALGORITHM, self.private_key).sign(_document_hash(document))
+        return b64encode(signed).decode()
+
+    def verify_document(self, document: Document, signature: str, public_key) -> bool:
+        """
+        Verifica a assinatura destacada de um documento.
+
+        :param document: O caminho do arquivo ou um fluxo binário aberto.
+        :param signature: A assinatura codificada em base64.
+        :param public_key: A chave pública do remetente.
+        :return: True se a assinatura for válida, False caso contrário.
+        """
+        return self.__verify_hash(_document_hash(document), signature, public_key)
+
+    def sign_document_merkle(self, document: Document, leaf_size: int = merkle.LEAF_SIZE,
+                             workers: int = None) -> tuple[str, list[bytes]]:
+        """
+        Assina a raiz da árvore de Merkle do documento. Os hashes das folhas são calculados
+        em paralelo e permitem verificar blocos isolados com verify_document_chunk.
+
+        :param document: O caminho do arquivo ou um fluxo binário aberto.
+        :param leaf_size: O tamanho de cada bloco (folha).
+        :param workers: Quantidade de threads de hashing (None: padrão).
+        :return: A assinatura da raiz em base64 e os hashes das folhas.
+        """
+        leaves = _document_merkle_leaves(document, leaf_size, workers)
+        signed = _new_scheme(self.ALGORITHM, self.private_key).sign(SHA256.new(merkle.root(leaves)))
+        return b64encode(signed).decode(), leaves
+
+    def verify_document_merkle(self, document: Document, signature: str, public_key,
+                               leaf_size: int = merkle.LEAF_SIZE, workers: int = None) -> bool:
+        """
+        Verifica a assinatura da raiz de Merkle de um documento completo.
+
+        :return: True se a assinatura for válida, False caso contrário.
+        """
+        leaves = _document_merkle_leaves(document, leaf_size, workers)
+        return self.__verify_hash(SHA256.new(merkle.root(leaves)), signature, public_key)
+
+    def verify_document_chunk(self, chunk: bytes, path: list[tuple[bytes, bool]], root: bytes,
+                              signature: str, public_key) -> bool:
+        """
+        Verifica um único bloco do documento sem acesso ao restante dele.
+
+        :param chunk: O conteúdo do bloco.
+        :param path: A prova de inclusão do bloco (merkle.proof).
+        :param root: A raiz de Merkle do documento (merkle.root).
+        :param signature: A assinatura da raiz em base64.
+        :param public_key: A chave pública do remetente.
+        :return: True se a raiz estiver assinada e o bloco pertencer a ela, False caso contrário.
+        """
+        return (merkle.verify_proof(chunk, path, root)
+                and self.__verify_hash(SHA256.new(root), signature, public_key))
+
+    def __verify_hash(self, digest, signature: str, public_key) -> bool:
+        try:
+            _new_scheme(self.ALGORITHM, public_key).verify(digest, b64decode(signature))
+            return True
+        except ValueError:
+            return False
+
+
+class RSA(_Signer):
+    ALGORITHM = 'RSA'
+
+    def __init__(self, key_size: int = 2048, public_exponent: int = 65537, key: CryptoRSA.RsaKey = None):
         """
         Inicializa a classe RSA gerando um par de chaves RSA com o tamanho e o expoente público especificados.
 
         :param key_size: Tamanho da chave RSA em bits (padrão 2048).
         :param public_exponent: Expoente público para a chave RSA (padrão 65537).
+        :param key: Chave privada RSA já existente (ex.: de um KeyPool); se informada, nenhuma chave é gerada.
         """
         self.private_key: CryptoRSA.RsaKey
         self.public_key: CryptoRSA.RsaKey
-        self.generate_keys(key_size, public_exponent)
+        if key is None:
+            self.generate_keys(key_size, public_exponent)
+        else:
+            self.private_key, self.public_key = key, key.public_key()
 
     def generate_keys(self, key_size: int, public_exponent: int):
         """
@@ -55,24 +420,34 @@ class RSA:
         except ValueError:
             return False
 
-class DSA:
-    def __init__(self, key_size: int = 2048):
+
+class DSA(_Signer):
+    ALGORITHM = 'DSA'
+
+    def __init__(self, key_size: int = 2048, key: CryptoDSA.DsaKey = None, domains: DSADomainCache = None):
         """
         Inicializa a classe DSA gerando um par de chaves DSA com o tamanho especificado.
 
         :param key_size: Tamanho da chave DSA em bits (padrão 2048).
+        :param key: Chave privada DSA já existente (ex.: de um KeyPool); se informada, nenhuma chave é gerada.
+        :param domains: Cache de parâmetros de domínio usado na geração (padrão DSA_DOMAINS).
         """
         self.private_key: CryptoDSA
         self.public_key: CryptoDSA
-        self.generate_keys(key_size)
+        if key is None:
+            self.generate_keys(key_size, domains)
+        else:
+            self.private_key, self.public_key = key, key.public_key()
 
-    def generate_keys(self, key_size: int):
+    def generate_keys(self, key_size: int, domains: DSADomainCache = None):
         """
-        Gera um par de chaves DSA e armazena a chave privada e pública na instância.
+        Gera um par de chaves DSA, a partir de parâmetros de domínio compartilhados,
+        e armazena a chave privada e pública na instância.
 
         :param key_size: Tamanho da chave DSA em bits.
+        :param domains: Cache de parâmetros de domínio (padrão DSA_DOMAINS).
         """
-        self.private_key = CryptoDSA.generate(key_size)
+        self.private_key = (domains or DSA_DOMAINS).generate_key(key_size)
         self.public_key = self.private_key.public_key()
 
     def sign_message(self, message: str) -> str:
@@ -104,16 +479,22 @@ class DSA:
             return False
 
 
-class ECDSA:
-    def __init__(self, curve: str = 'P-256'):
+class ECDSA(_Signer):
+    ALGORITHM = 'ECDSA'
+
+    def __init__(self, curve: str = 'P-256', key: ECC.EccKey = None):
         """
         Inicializa a classe ECDSA gerando um par de chaves ECDSA com a curva especificada.
 
         :param curve: Nome da curva elíptica (padrão 'P-256').
+        :param key: Chave privada ECDSA já existente (ex.: de um KeyPool); se informada, nenhuma chave é gerada.
         """
         self.private_key: ECC.EccKey
         self.public_key: ECC.EccKey
-        self.generate_keys(curve)
+        if key is None:
+            self.generate_keys(curve)
+        else:
+            self.private_key, self.public_key = key, key.public_key()
 
     def generate_keys(self, curve: str):
         """
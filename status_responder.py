@@ -0,0 +1,181 @@
+"""
+Respondedor local de status de certificados no estilo OCSP, com respostas pre-assinadas.
+"""
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives import serialization
+from cryptography.x509 import ocsp
+from datetime import timedelta
+import datetime
+import queue
+import threading
+
+# Periodo de validade (nextUpdate - thisUpdate) de cada resposta assinada
+RESPONSE_FRESHNESS = timedelta(hours=1)
+# Respostas sao reassinadas quando faltar menos que isto para expirarem
+REFRESH_MARGIN = timedelta(minutes=10)
+# Intervalo entre as varreduras de certificados novos ou com respostas perto de expirar
+SWEEP_INTERVAL = 30.0
+
+
+class StatusResponder:
+    """
+    Responde "o certificado de numero de serie X e valido?" com respostas OCSP assinadas
+    pela AC.
+
+    Como a assinatura RSA com a chave da AC e a parte cara, uma thread em segundo plano
+    pre-assina as respostas de todos os certificados do armazenamento da AC, reassina as que
+    estao perto de expirar e, a cada revogacao, regenera apenas a resposta afetada. Assim,
+    uma consulta custa uma busca no cache; somente falhas de cache assinam na hora.
+
+    Args:
+        ac (AC): A AC cujos certificados serao atendidos.
+        freshness (timedelta): Validade de cada resposta.
+        refresh_margin (timedelta): Antecedencia com que as respostas sao reassinadas.
+    """
+    def __init__(self, ac, freshness=RESPONSE_FRESHNESS, refresh_margin=REFRESH_MARGIN):
+        self.ac = ac
+        self.freshness = freshness
+        self.refresh_margin = refresh_margin
+        self.hits = 0
+        self.misses = 0
+        self.__responses = {}
+        # Incrementado a cada revogacao: uma assinatura iniciada antes dela nao e guardada
+        self.__generations = {}
+        self.__lock = threading.Lock()
+        self.__urgent = queue.Queue()
+        self.__stop = threading.Event()
+        self.__thread = None
+        self.__unauthorized = ocsp.OCSPResponseBuilder.build_unsuccessful(
+            ocsp.OCSPResponseStatus.UNAUTHORIZED).public_bytes(serialization.Encoding.DER)
+        ac.addRevocationListener(self.__on_revocation)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """
+        Inicia a thread que pre-assina e renova as respostas.
+        """
+        if self.__thread is None:
+            self.__stop.clear()
+            self.__thread = threading.Thread(target=self.__run, name="status-responder", daemon=True)
+            self.__thread.start()
+
+    def stop(self):
+        """
+        Interrompe a thread de pre-assinatura.
+        """
+        if self.__thread is not None:
+            self.__stop.set()
+            self.__urgent.put(None)
+            self.__thread.join()
+            self.__thread = None
+
+    def status(self, serial_number):
+        """
+        Retorna a resposta OCSP (DER) para um numero de serie.
+
+        Args:
+            serial_number (int): O numero de serie consultado.
+
+        Returns:
+            bytes: A resposta assinada, ou uma resposta "unauthorized" se o certificado nao for desta AC.
+        """
+        entry = self.__responses.get(serial_number)
+        if entry is not None and entry[0] > datetime.datetime.now(datetime.timezone.utc):
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return self.__refresh(serial_number)
+
+    def respond(self, request_der):
+        """
+        Atende uma requisicao OCSP codificada em DER.
+
+        Returns:
+            bytes: A resposta OCSP (DER).
+        """
+        return self.status(ocsp.load_der_ocsp_request(request_der).serial_number)
+
+    def __on_revocation(self, serial_number):
+        # Descarta a resposta "good" imediatamente; a nova e assinada em segundo plano
+        with self.__lock:
+            self.__responses.pop(serial_number, None)
+            self.__generations[serial_number] = self.__generations.get(serial_number, 0) + 1
+        self.__urgent.put(serial_number)
+
+    def __refresh(self, serial_number):
+        """
+        Assina e guarda em cache a resposta atual de um numero de serie.
+        """
+        stored = self.ac.certificados.get(serial_number)
+        if stored is None or stored.certificate.issuer != self.ac.ca_name:
+            return self.__unauthorized
+
+        while True:
+            with self.__lock:
+                generation = self.__generations.get(serial_number, 0)
+            response, next_update = self.__sign_response(stored.certificate, serial_number)
+            with self.__lock:
+                # Se o certificado foi revogado durante a assinatura, a resposta pode estar
+                # desatualizada ("good") e sobrescreveria a de revogacao: assina de novo
+                if self.__generations.get(serial_number, 0) == generation:
+                    self.__responses[serial_number] = (next_update, response)
+                    return response
+
+    def __sign_response(self, certificate, serial_number):
+        """
+        Assina a resposta OCSP com o status atual do certificado.
+        """
+        this_update = datetime.datetime.now(datetime.timezone.utc)
+        next_update = this_update + self.freshness
+        revocation_time = self.ac.certificados.revocation_date(serial_number)
+        response = ocsp.OCSPResponseBuilder().add_response(
+            cert=certificate,
+            issuer=self.ac.ca_certificate,
+            algorithm=hashes.SHA256(),
+            cert_status=ocsp.OCSPCertStatus.GOOD if revocation_time is None else ocsp.OCSPCertStatus.REVOKED,
+            this_update=this_update,
+            next_update=next_update,
+            revocation_time=revocation_time,
+            revocation_reason=None
+        ).responder_id(
+            ocsp.OCSPResponderEncoding.HASH, self.ac.ca_certificate
+        ).sign(self.ac.ca_private_key, hashes.SHA256()).public_bytes(serialization.Encoding.DER)
+        return response, next_update
+
+    def __sweep(self):
+        """
+        Assina as respostas ausentes (certificados novos) e as que estao perto de expirar.
+        """
+        for serial_number in self.ac.certificados.serials():
+            if self.__stop.is_set():
+                return
+            while not self.__urgent.empty():
+                self.__handle_urgent()
+            entry = self.__responses.get(serial_number)
+            deadline = datetime.datetime.now(datetime.timezone.utc) + self.refresh_margin
+            if entry is None or entry[0] <= deadline:
+                self.__refresh(serial_number)
+
+    def __handle_urgent(self, timeout=None):
+        try:
+            serial_number = self.__urgent.get(timeout=timeout)
+        except queue.Empty:
+            return
+        if serial_number is not None:
+            self.__refresh(serial_number)
+
+    def __run(self):
+        while not self.__stop.is_set():
+            self.__sweep()
+            deadline = datetime.datetime.now(datetime.timezone.utc) + timedelta(seconds=SWEEP_INTERVAL)
+            while not self.__stop.is_set():
+                remaining = (deadline - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+                if remaining <= 0:
+                    break
+                self.__handle_urgent(timeout=remaining)
@@ -0,0 +1,174 @@
+"""
+Testes do formato de envelope (RSA.py) e da cifragem autenticada AES-GCM (aes.py).
+"""
+import io
+import os
+import struct
+
+import pytest
+from Cryptodome.Cipher import AES
+
+import aes
+import RSA as rsa_module
+from RSA import RSA
+
+# Segmentos pequenos para que mensagens curtas ocupem varios segmentos
+SMALL_SEGMENT = 32
+
+
+@pytest.fixture(scope="module")
+def alice():
+    return RSA(1024)
+
+
+@pytest.fixture(scope="module")
+def bob():
+    return RSA(1024)
+
+
+def _envelope(sender, message, recipients, segment_size=SMALL_SEGMENT):
+    output = io.BytesIO()
+    sender.encrypt_envelope_stream(message, output, [recipient.public_key for recipient in recipients],
+                                   segment_size)
+    return output.getvalue()
+
+
+def _header_size(recipients):
+    # MAGIC | quantidade | (id da chave | tamanho | chave cifrada)... | sal | tamanho do segmento
+    wrapped = sum(rsa_module.KEY_ID_SIZE + 2 + recipient.public_key.size_in_bytes() for recipient in recipients)
+    return len(rsa_module.ENVELOPE_MAGIC) + 2 + wrapped + rsa_module.SALT_SIZE + 4
+
+
+def _flip(data, position):
+    data = bytearray(data)
+    data[position] ^= 0x01
+    return bytes(data)
+
+
+@pytest.mark.parametrize("size", [0, 1, SMALL_SEGMENT - 1, SMALL_SEGMENT, 5 * SMALL_SEGMENT, 5 * SMALL_SEGMENT + 7])
+def test_envelope_round_trip(alice, size):
+    message = os.urandom(size)
+    assert alice.decrypt_envelope(_envelope(alice, message, [alice])) == message
+
+
+def test_envelope_round_trip_default_segment_size(alice, bob):
+    message = os.urandom(2 * rsa_module.SEGMENT_SIZE + 123)
+    envelope = alice.encrypt_envelope(message, [alice.public_key, bob.public_key])
+    assert alice.decrypt_envelope(envelope) == message
+    assert bob.decrypt_envelope(envelope) == message
+
+
+def test_envelope_rejects_other_recipients(alice, bob):
+    with pytest.raises(ValueError):
+        bob.decrypt_envelope(_envelope(alice, b"segredo", [alice]))
+
+
+def test_batch_envelopes_use_distinct_salts(alice):
+    messages = [b"mensagem"] * 3
+    envelopes = alice.encrypt_envelopes(messages, [alice.public_key])
+    assert alice.decrypt_envelopes(envelopes) == messages
+    header_size = _header_size([alice])
+    salts = {envelope[header_size - rsa_module.SALT_SIZE - 4:header_size - 4] for envelope in envelopes}
+    assert len(salts) == 3
+    assert len({envelope[header_size:] for envelope in envelopes}) == 3
+
+
+@pytest.mark.parametrize("position", [
+    0,                                   # MAGIC
+    len(rsa_module.ENVELOPE_MAGIC) + 2,  # id da chave
+    -rsa_module.SALT_SIZE - 4,           # sal
+    -1,                                  # tamanho do segmento
+])
+def test_envelope_rejects_tampered_header(alice, position):
+    envelope = _envelope(alice, os.urandom(3 * SMALL_SEGMENT), [alice])
+    header_size = _header_size([alice])
+    with pytest.raises(ValueError):
+        alice.decrypt_envelope(_flip(envelope, position % header_size))
+
+
+def test_envelope_rejects_tampered_wrapped_key(alice):
+    envelope = _envelope(alice, os.urandom(3 * SMALL_SEGMENT), [alice])
+    wrapped_key = len(rsa_module.ENVELOPE_MAGIC) + 2 + rsa_module.KEY_ID_SIZE + 2
+    with pytest.raises(ValueError):
+        alice.decrypt_envelope(_flip(envelope, wrapped_key + 10))
+
+
+@pytest.mark.parametrize("segment", [0, 1, 2])
+def test_envelope_rejects_tampered_segment(alice, segment):
+    envelope = _envelope(alice, os.urandom(3 * SMALL_SEGMENT), [alice])
+    position = _header_size([alice]) + segment * (SMALL_SEGMENT + aes.TAG_SIZE) + 5
+    with pytest.raises(ValueError):
+        alice.decrypt_envelope(_flip(envelope, position))
+
+
+def test_envelope_rejects_reordered_segments(alice):
+    envelope = _envelope(alice, os.urandom(4 * SMALL_SEGMENT), [alice])
+    header_size, sealed_size = _header_size([alice]), SMALL_SEGMENT + aes.TAG_SIZE
+    segments = [envelope[start:start + sealed_size] for start in range(header_size, len(envelope), sealed_size)]
+    segments[0], segments[1] = segments[1], segments[0]
+    with pytest.raises(ValueError):
+        alice.decrypt_envelope(envelope[:header_size] + b"".join(segments))
+
+
+def test_envelope_rejects_segments_from_another_envelope(alice):
+    first = _envelope(alice, os.urandom(3 * SMALL_SEGMENT), [alice])
+    second = _envelope(alice, os.urandom(3 * SMALL_SEGMENT), [alice])
+    header_size = _header_size([alice])
+    with pytest.raises(ValueError):
+        alice.decrypt_envelope(first[:header_size] + second[header_size:])
+
+
+@pytest.mark.parametrize("removed", [
+    1,                                 # parte da etiqueta do ultimo segmento
+    SMALL_SEGMENT + aes.TAG_SIZE,      # ultimo segmento inteiro
+    2 * (SMALL_SEGMENT + aes.TAG_SIZE),
+])
+def test_envelope_rejects_truncated_segments(alice, removed):
+    envelope = _envelope(alice, os.urandom(4 * SMALL_SEGMENT), [alice])
+    with pytest.raises(ValueError):
+        alice.decrypt_envelope(envelope[:-removed])
+
+
+def test_envelope_rejects_truncated_header(alice):
+    envelope = _envelope(alice, b"conteudo", [alice])
+    for size in (0, 3, len(rsa_module.ENVELOPE_MAGIC) + 4, _header_size([alice]) - 1, _header_size([alice])):
+        with pytest.raises(ValueError):
+            alice.decrypt_envelope(envelope[:size])
+
+
+def test_envelope_segment_size_is_bounded(alice):
+    with pytest.raises(ValueError):
+        _envelope(alice, b"x", [alice], segment_size=rsa_module.MAX_SEGMENT_SIZE + 1)
+    with pytest.raises(ValueError):
+        _envelope(alice, b"x", [alice], segment_size=0)
+
+    envelope = bytearray(_envelope(alice, b"x", [alice]))
+    header_size = _header_size([alice])
+    envelope[header_size - 4:header_size] = struct.pack(">I", rsa_module.MAX_SEGMENT_SIZE + 1)
+    with pytest.raises(ValueError, match="segmento"):
+        alice.decrypt_envelope(bytes(envelope))
+
+
+def test_envelope_keys_stay_out_of_context_cache(alice):
+    aes.CONTEXT_CACHE.clear()
+    alice.decrypt_envelope(_envelope(alice, os.urandom(3 * SMALL_SEGMENT), [alice]))
+    assert len(aes.CONTEXT_CACHE) == 0
+
+
+def test_seal_round_trip_and_authentication():
+    context = aes.AESContext(os.urandom(32), AES.MODE_GCM)
+    nonce = os.urandom(aes.GCM_NONCE_SIZE)
+    sealed = context.seal(nonce, b"mensagem", b"dados associados")
+    assert len(sealed) == len(b"mensagem") + aes.TAG_SIZE
+    assert context.unseal(nonce, sealed, b"dados associados") == b"mensagem"
+
+    with pytest.raises(ValueError):
+        context.unseal(nonce, _flip(sealed, 0), b"dados associados")
+    with pytest.raises(ValueError):
+        context.unseal(nonce, _flip(sealed, len(sealed) - 1), b"dados associados")
+    with pytest.raises(ValueError):
+        context.unseal(nonce, sealed, b"outros dados")
+    with pytest.raises(ValueError):
+        context.unseal(_flip(nonce, 0), sealed, b"dados associados")
+    with pytest.raises(ValueError):
+        context.unseal(nonce, sealed[:-1], b"dados associados")
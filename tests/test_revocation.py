@@ -0,0 +1,82 @@
+"""
+Testes do indice de revogacao e da numeracao das LCRs completas e delta.
+"""
+import datetime
+
+import pytest
+from cryptography import x509
+
+import revocation
+from AC import AC
+from cert_store import CertificateStore
+from revocation import RevocationIndex
+
+
+def _crl_number(crl):
+    return crl.extensions.get_extension_for_class(x509.CRLNumber).value.crl_number
+
+
+def _serials(crl):
+    return sorted(revoked.serial_number for revoked in crl)
+
+
+def test_revocation_index_contains_initial_and_added_serials():
+    serials = [3, 1 << 158, 42, 7]
+    index = RevocationIndex(serials)
+    for serial in (5, 9, (1 << 159) - 1):
+        index.add(serial)
+    index.add(42)
+
+    assert len(index) == 7
+    assert list(index) == sorted(serials + [5, 9, (1 << 159) - 1])
+    assert all(serial in index for serial in serials + [5, 9])
+    assert 4 not in index and -1 not in index and (1 << 200) not in index
+
+
+def test_revocation_index_merges_pending_serials(monkeypatch):
+    monkeypatch.setattr(revocation, "MERGE_SIZE", 4)
+    index = RevocationIndex(range(0, 1000, 2))
+    for serial in range(1, 200, 2):
+        index.add(serial)
+
+    assert len(index) == 600
+    assert all(serial in index for serial in range(0, 200))
+    assert 1001 not in index
+    assert list(index) == sorted([*range(0, 1000, 2), *range(1, 200, 2)])
+
+
+def test_revocation_index_rejects_serials_wider_than_20_bytes():
+    with pytest.raises(ValueError):
+        RevocationIndex().add(1 << 160)
+    with pytest.raises(ValueError):
+        RevocationIndex().add(-1)
+
+
+def test_crl_numbers_and_delta_entries_survive_store_reopen(tmp_path):
+    path = str(tmp_path / "ac.db")
+    ac = AC(CertificateStore(path))
+    ac.issueSelfsignedCertificate()
+    ac.revokeCertificate(11)
+    full = ac.publishCRL()
+    ac.revokeCertificate(22, datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc))
+    delta = ac.publishDeltaCRL()
+    ac.certificados.close()
+
+    assert _crl_number(full) == 1 and _serials(full) == [11]
+    assert _crl_number(delta) == 2 and _serials(delta) == [22]
+
+    reopened = AC(CertificateStore(path))
+    reopened.issueSelfsignedCertificate()
+    assert 11 in reopened.revogados and 22 in reopened.revogados
+    reopened.revokeCertificate(33)
+
+    delta = reopened.publishDeltaCRL()
+    assert _crl_number(delta) == 3
+    assert delta.extensions.get_extension_for_class(x509.DeltaCRLIndicator).value.crl_number == 1
+    # A revogacao com data retroativa, feita antes do reinicio, continua na delta
+    assert _serials(delta) == [22, 33]
+
+    full = reopened.publishCRL()
+    assert _crl_number(full) == 4 and _serials(full) == [11, 22, 33]
+    assert _serials(reopened.publishDeltaCRL()) == []
+    reopened.certificados.close()
@@ -0,0 +1,117 @@
+"""Vigenere cryptanalysis: key length estimation and key recovery"""
+
+import string
+from typing import Sequence
+
+from vigenere_cipher import VigenereCipher
+
+_ALPHABET = string.ascii_uppercase.encode()
+
+# Relative letter frequencies (A-Z), in percent
+ENGLISH_FREQUENCIES = (
+    8.167, 1.492, 2.782, 4.253, 12.702, 2.228, 2.015, 6.094, 6.966, 0.153,
+    0.772, 4.025, 2.406, 6.749, 7.507, 1.929, 0.095, 5.987, 6.327, 9.056,
+    2.758, 0.978, 2.360, 0.150, 1.974, 0.074,
+)
+PORTUGUESE_FREQUENCIES = (
+    14.63, 1.04, 3.88, 4.99, 12.57, 1.02, 1.30, 1.28, 6.18, 0.40,
+    0.02, 2.78, 4.74, 5.05, 10.73, 2.52, 1.20, 6.53, 7.81, 4.34,
+    4.63, 1.67, 0.01, 0.21, 0.01, 0.47,
+)
+
+# A key length is accepted once its IoC reaches this fraction of the best one,
+# so that multiples of the real length do not win by a small margin
+IOC_TOLERANCE = 0.9
+# Letters used to estimate the key length; the IoC of each column is already
+# stable with a few thousand letters, so larger texts are only sampled
+KEY_LENGTH_SAMPLE = 1 << 18
+
+
+class VigenereCryptanalysis:
+    """Class to recover Vigenere keys from ciphertexts alone
+
+    Letter counts are taken per key column over strided views of the
+    ciphertext bytes (bytes.count runs in C), so a single candidate length
+    costs a few passes over the data regardless of its size.
+    """
+
+    @classmethod
+    def __encode(cls, ciphertext: str) -> bytes:
+        data = ciphertext.encode('ascii')
+        if data.translate(None, _ALPHABET):
+            raise ValueError('ciphertext must only contain A-Z letters')
+        return data
+
+    @classmethod
+    def column_counts(cls, data: bytes, key_length: int) -> 'list[list[int]]':
+        """Letter counts of each of the key_length columns of data"""
+        counts = []
+        for column in range(key_length):
+            view = data[column::key_length]
+            counts.append([view.count(letter) for letter in _ALPHABET])
+        return counts
+
+    @classmethod
+    def index_of_coincidence(cls, counts: Sequence[int]) -> float:
+        """Probability that two letters drawn from the counted text are equal"""
+        total = sum(counts)
+        if total < 2:
+            return 0.0
+        return sum(n * (n - 1) for n in counts) / (total * (total - 1))
+
+    @classmethod
+    def key_length_scores(cls, ciphertext: str, max_length: int = 20) -> 'dict[int, float]':
+        """Average column IoC for every candidate key length from 1 to max_length,
+        computed over the first KEY_LENGTH_SAMPLE letters
+        """
+        data = cls.__encode(ciphertext[:KEY_LENGTH_SAMPLE])
+        max_length = min(max_length, max(len(data) // 2, 1))
+        return {
+            length: sum(map(cls.index_of_coincidence, cls.column_counts(data, length))) / length
+            for length in range(1, max_length + 1)
+        }
+
+    @classmethod
+    def estimate_key_length(cls, ciphertext: str, max_length: int = 20) -> int:
+        """Smallest key length whose average IoC is close to the best one"""
+        scores = cls.key_length_scores(ciphertext, max_length)
+        best = max(scores.values())
+        return next(length for length, score in scores.items() if score >= IOC_TOLERANCE * best)
+
+    @classmethod
+    def recover_key(
+        cls,
+        ciphertext: str,
+        key_length: int,
+        frequencies: Sequence[float] = ENGLISH_FREQUENCIES
+    ) -> str:
+        """Recover each key letter as the shift whose column counts best correlate
+        with the expected letter frequencies
+        """
+        key = []
+        for counts in cls.column_counts(cls.__encode(ciphertext), key_length):
+            best_shift = max(
+                range(26),
+                key=lambda shift: sum(
+                    counts[(i + shift) % 26] * frequency
+                    for i, frequency in enumerate(frequencies)
+                )
+            )
+            key.append(chr(_ALPHABET[best_shift]))
+        return ''.join(key)
+
+    @classmethod
+    def break_cipher(
+        cls,
+        ciphertext: str,
+        max_key_length: int = 20,
+        frequencies: Sequence[float] = ENGLISH_FREQUENCIES
+    ) -> 'tuple[str, str]':
+        """Estimate the key length, recover the key and decipher the text
+
+        Returns:
+            tuple with the recovered key and the deciphered text
+        """
+        key_length = cls.estimate_key_length(ciphertext, max_key_length)
+        key = cls.recover_key(ciphertext, key_length, frequencies)
+        return key, VigenereCipher.decipher(ciphertext, key)
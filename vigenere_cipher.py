@@ -1,70 +1,115 @@
 """Vigenere Cipher exercise"""
 
 import string
-from typing import Callable
+from typing import Iterable, Iterator
+
+_ALPHABET = string.ascii_uppercase.encode()
+# _SHIFT_TABLES[s] replaces each letter by the letter s positions ahead
+_SHIFT_TABLES = [
+    bytes.maketrans(_ALPHABET, _ALPHABET[shift:] + _ALPHABET[:shift])
+    for shift in range(26)
+]
 
 
 class VigenereCipher:
-    """Class to handle Vigenere scripts"""
-    __alphabet = list(string.ascii_uppercase)
+    """Class to handle Vigenere scripts
+
+    Texts are processed as ASCII bytes: every position that shares the same key
+    letter forms a strided column, which is substituted at once through a
+    precomputed bytes.translate table.
+    """
+    __alphabet = _ALPHABET
+    __tables = _SHIFT_TABLES
 
     @classmethod
-    def __get_replacement_char_for_cipher(
-        cls, original: str, shift: str
-    ) -> str:
-        total_shift = (
-            cls.__alphabet.index(original) + cls.__alphabet.index(shift)
-        )
-        return cls.__alphabet[total_shift % 26]
+    def __encode(cls, text: str, description: str) -> bytes:
+        """Encode a text as ASCII bytes, rejecting characters outside the alphabet"""
+        try:
+            data = text.encode('ascii')
+        except UnicodeEncodeError as error:
+            raise ValueError(f'{description} must only contain A-Z letters') from error
+        if data.translate(None, cls.__alphabet):
+            raise ValueError(f'{description} must only contain A-Z letters')
+        return data
 
     @classmethod
-    def __get_replacement_char_for_decipher(
-        cls, original: str, shift: str
-    ) -> str:
-        total_shift = (
-            cls.__alphabet.index(original) - cls.__alphabet.index(shift)
-        )
-        return cls.__alphabet[total_shift % 26]
+    def __key_shifts(cls, secret_key: str) -> 'list[int]':
+        shifts = [char - cls.__alphabet[0] for char in cls.__encode(secret_key, 'secret key')]
+        if not shifts:
+            raise ValueError('secret key must not be empty')
+        return shifts
+
+    @classmethod
+    def __transform(cls, data: bytes, shifts: 'list[int]', direction: int) -> str:
+        """Substitute each key column of data, shifting it forward (1) or backward (-1)"""
+        output = bytearray(len(data))
+        step = len(shifts)
+        for column, shift in enumerate(shifts[:len(data)]):
+            output[column::step] = data[column::step].translate(
+                cls.__tables[(direction * shift) % 26]
+            )
+        return output.decode('ascii')
 
     @classmethod
     def __general_operation(
         cls,
         original_text: str,
         secret_key: str,
-        substitution_function: Callable
+        direction: int
     ) -> str:
         """General Vigenere operation. In this cipher, ciphering and
-        deciphering work the same way, just changing the substitution function
+        deciphering work the same way, just changing the shift direction
         """
-        secret_key_length = len(secret_key)
-        final_text = ''
-        for i, char in enumerate(original_text):
-            secret_key_shift = secret_key[(i % secret_key_length)]
-            final_text += substitution_function(char, secret_key_shift)
+        return cls.__transform(
+            cls.__encode(original_text, 'text'), cls.__key_shifts(secret_key), direction
+        )
 
-        return final_text
+    @classmethod
+    def __stream_operation(
+        cls,
+        chunks: Iterable[str],
+        secret_key: str,
+        direction: int
+    ) -> Iterator[str]:
+        """Apply the operation chunk by chunk, carrying the key offset across chunks"""
+        shifts = cls.__key_shifts(secret_key)
+        offset = 0
+        for chunk in chunks:
+            yield cls.__transform(
+                cls.__encode(chunk, 'text'), shifts[offset:] + shifts[:offset], direction
+            )
+            offset = (offset + len(chunk)) % len(shifts)
 
     @classmethod
     def cipher(cls, plain_text: str, secret_key: str) -> str:
         """Cipher a plain text based on a secret key"""
-        return cls.__general_operation(
-            plain_text, secret_key, cls.__get_replacement_char_for_cipher
-        )
+        return cls.__general_operation(plain_text, secret_key, 1)
 
     @classmethod
     def decipher(cls, ciphered_text: str, secret_key: str) -> str:
         """Decipher a ciphered text based on a secret key"""
-        return cls.__general_operation(
-            ciphered_text, secret_key, cls.__get_replacement_char_for_decipher
-        )
+        return cls.__general_operation(ciphered_text, secret_key, -1)
+
+    @classmethod
+    def cipher_stream(cls, plain_chunks: Iterable[str], secret_key: str) -> Iterator[str]:
+        """Cipher a text given in chunks, yielding one ciphered chunk per input chunk.
+        The concatenated output equals cipher() over the concatenated input
+        """
+        return cls.__stream_operation(plain_chunks, secret_key, 1)
+
+    @classmethod
+    def decipher_stream(cls, ciphered_chunks: Iterable[str], secret_key: str) -> Iterator[str]:
+        """Decipher a text given in chunks, yielding one deciphered chunk per input chunk"""
+        return cls.__stream_operation(ciphered_chunks, secret_key, -1)
 
 
-TEXT = input().strip()
-KEY = input().strip()
-OPERATION = input().strip()
+if __name__ == '__main__':
+    TEXT = input().strip()
+    KEY = input().strip()
+    OPERATION = input().strip()
 
-print(
-    VigenereCipher.cipher(TEXT, KEY)
-    if OPERATION == 'c'
-    else VigenereCipher.decipher(TEXT, KEY)
-)
+    print(
+        VigenereCipher.cipher(TEXT, KEY)
+        if OPERATION == 'c'
+        else VigenereCipher.decipher(TEXT, KEY)
+    )